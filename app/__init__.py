@@ -1,7 +1,12 @@
-from flask import Flask, request, Response, jsonify
+from flask import Flask, jsonify
 import os
 from .models import db
-from .extenstions import ma, limiter, cache
+from .extenstions import ma, limiter, cache, init_cache_invalidation, list_cache_timeout
+from .util.summaries import init_summary_maintenance
+from .util.passwords import init_password_hashing, hash_pool_stats
+from .util.access_log import init_access_log
+from .util.cors import init_cors
+from .util.compression import init_compression
 from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.service_tickets import service_tickets_bp
@@ -10,7 +15,6 @@ from .blueprints.inventory import inventory_bp
 from .blueprints.item_descriptions import item_descriptions_bp
 from .blueprints.invoice import invoice_bp
 from flask_swagger_ui import get_swaggerui_blueprint
-from flask_cors import CORS
 import logging
 import traceback
 
@@ -33,86 +37,28 @@ def create_app(config_name='DevelopmentConfig'):
     db.init_app(app)
     ma.init_app(app)
     limiter.init_app(app)
+    # Long list TTLs only with a cache every worker shares (see list_cache_timeout)
+    app.config.setdefault('CACHE_DEFAULT_TIMEOUT', list_cache_timeout(app.config.get('CACHE_TYPE')))
     cache.init_app(app)
+    init_cache_invalidation(db.session)
+    init_summary_maintenance(db.session)
+    init_password_hashing(app)
 
     # Configure Swagger UI blueprint
     swagger_blueprint = get_swaggerui_blueprint(SWAGGER_URL, API_URL, config={'app_name': "Mechanic Shop API"})
 
-    # === Enhanced CORS configuration ===
-    cors_origins = app.config.get('CORS_ORIGINS', ["http://localhost:5173"])
-    # Ensure list type
-    if isinstance(cors_origins, str):
-        cors_origins = [cors_origins]
-    cors_supports_credentials = app.config.get('CORS_SUPPORTS_CREDENTIALS', True)
-    cors_methods = app.config.get('CORS_METHODS', ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
-    cors_headers = app.config.get('CORS_HEADERS', ["Content-Type", "Authorization", "X-Requested-With"])
-
-    # Enhanced CORS configuration with explicit OPTIONS handling
-    # ensure 'resources' covers all endpoints so CORS rules apply consistently
-    CORS(
-        app,
-        resources={r"/*": {"origins": cors_origins}},
-        origins=cors_origins,
-        supports_credentials=cors_supports_credentials,
-        methods=cors_methods,
-        allow_headers=cors_headers,
-        expose_headers=["Content-Range", "X-Content-Range"],
-        send_wildcard=False,
-        automatic_options=True
-    )
-
-    # Add explicit OPTIONS handler for all routes
-    @app.before_request
-    def handle_preflight():
-        if request.method == "OPTIONS":
-            res = Response(status=200)
-            res.headers['X-Content-Type-Options'] = 'nosniff'
-            res.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
-            res.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,DELETE,OPTIONS,PATCH'
-            res.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,X-Requested-With'
-            res.headers['Access-Control-Allow-Credentials'] = 'true'
-            return res
-
-    # Ensure all real responses include CORS headers (prevents Authorization being dropped)
-    @app.after_request
-    def add_cors_headers(response):
-        origin = request.headers.get('Origin') or '*'
-        # Only echo back allowed origin or '*' (keeps responses explicit)
-        if cors_origins and origin != '*' and origin in cors_origins:
-            response.headers['Access-Control-Allow-Origin'] = origin
-        else:
-            response.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Access-Control-Allow-Methods'] = ','.join(cors_methods)
-        response.headers['Access-Control-Allow-Headers'] = ','.join(cors_headers)
-        # helpful expose header
-        response.headers.setdefault('Access-Control-Expose-Headers', 'Content-Range, X-Content-Range')
-        return response
-
-    # Log all incoming headers for debugging
-    @app.before_request
-    def log_incoming_headers():
-        app.logger.debug(f"Incoming request: {request.method} {request.path}")
-        app.logger.debug(f"Headers: {dict(request.headers)}")
+    # CORS headers are precomputed per allowed origin (app/util/cors.py)
+    init_cors(app)
+    # Negotiated gzip/deflate above COMPRESS_MIN_SIZE (app/util/compression.py)
+    init_compression(app)
 
     # Enable debug logging to console
     if not app.logger.handlers:
         logging.basicConfig(level=logging.DEBUG)
     app.logger.setLevel(logging.DEBUG if app.config.get('DEBUG') else logging.INFO)
 
-    # Log request bodies for debug (helpful to see what the frontend sent when a 500 occurs)
-    @app.before_request
-    def log_request_body_for_debug():
-        # Only log for non-OPTIONS mutating methods and when debugging
-        if app.debug and request.method in ('POST', 'PUT', 'PATCH', 'DELETE'):
-            try:
-                body = request.get_json(silent=True)
-                if body is None:
-                    # Fallback to raw data if not JSON-parsable
-                    body = request.get_data(as_text=True)
-                app.logger.debug("Incoming request %s %s body: %s", request.method, request.path, body)
-            except Exception as e:
-                app.logger.debug("Failed to parse request body for %s %s: %s", request.method, request.path, e)
+    # Structured access log (app/util/access_log.py); header and body dumps only with ACCESS_LOG_DEBUG
+    init_access_log(app)
 
     # Register blueprints
     app.register_blueprint(customers_bp, url_prefix='/customers')
@@ -127,7 +73,7 @@ def create_app(config_name='DevelopmentConfig'):
     # Simple health endpoint for quick availability checks (useful from frontend /dev proxy)
     @app.route('/health', methods=['GET'])
     def health():
-        return jsonify({"status": "ok"}), 200
+        return jsonify({"status": "ok", "password_hashing": hash_pool_stats()}), 200
 
     # Global exception handler that returns JSON and logs a traceback to assist debugging 500s
     @app.errorhandler(Exception)
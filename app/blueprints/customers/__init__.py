@@ -1,6 +1,6 @@
 from flask import Blueprint
 
-customers_bp = Blueprint('customers_bp', __name__)
+customers_bp = Blueprint('customers_bp', __name__, cli_group='customers')
 
 from . import route
 
@@ -1,11 +1,79 @@
 from . import customers_bp
-from .schema import customer_schema, customers_schema, login_schema
-from flask import request, jsonify
+from .schema import customer_schema, login_schema, customer_list_fields, customer_import_schema
+from flask import request, jsonify, current_app
 from marshmallow import ValidationError
-from app.models import Customers, db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.models import Customers, Service_Ticket, Invoice, Invoice_Inventory_Link, Ticket_Mechanics, db
 from app.util.auth import role_required, token_required, create_customer_token
 from sqlalchemy.exc import IntegrityError
+from app.util.fieldsets import parse_fields, read_rows
+from app.util.serializers import row_serializer, dump_rows
+from app.util.bulk_import import read_records, NDJSON_TYPES
+from app.util.passwords import hash_passwords, hash_password, verify_password, rehash_if_outdated
+from app.util.summaries import discount_service_tickets
+from sqlalchemy import select, insert, update, delete, func, or_
+from collections import Counter
+import click
+
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_ROWS = 10000
+DELETE_CHUNK_SIZE = 1000
+
+
+def _insert_customers(rows, errors):
+    # executemany per chunk inside a savepoint; a chunk that hits a unique violation
+    # (an email registered while the import ran) is retried row by row.
+    created = 0
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        chunk = rows[start:start + IMPORT_BATCH_SIZE]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(Customers), [data for _, data in chunk])
+            created += len(chunk)
+            continue
+        except IntegrityError:
+            pass
+        for number, data in chunk:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(Customers), [data])
+                created += 1
+            except IntegrityError:
+                errors.append({"row": number, "errors": {"email": ["Email already in use"]}})
+    return created
+
+
+def import_customers(text, content_type):
+    # Bulk create customers from CSV or NDJSON. Invalid and duplicate rows are reported
+    # per row; every other row is imported.
+    errors, valid = [], []
+    for number, record, error in read_records(text, content_type):
+        if error:
+            errors.append({"row": number, "errors": error})
+            continue
+        try:
+            valid.append((number, customer_import_schema.load(record)))
+        except ValidationError as e:
+            errors.append({"row": number, "errors": e.messages})
+    if len(valid) + len(errors) > MAX_IMPORT_ROWS:
+        raise ValueError(f"At most {MAX_IMPORT_ROWS} rows per import")
+
+    # One query for every email already on file, then duplicates within the file itself
+    emails = {data['email'] for _, data in valid}
+    existing = set(db.session.scalars(select(Customers.email).where(Customers.email.in_(emails)))) if emails else set()
+    rows, seen = [], set()
+    for number, data in valid:
+        if data['email'] in existing or data['email'] in seen:
+            errors.append({"row": number, "errors": {"email": ["Email already in use"]}})
+            continue
+        seen.add(data['email'])
+        rows.append((number, data))
+
+    for (_, data), hashed in zip(rows, hash_passwords(data['password'] for _, data in rows)):
+        data['password'] = hashed
+
+    created = _insert_customers(rows, errors)
+    db.session.commit()
+    return {"created": created, "errors": sorted(errors, key=lambda e: e['row'])}
 
 #  =========================================================================
 
@@ -18,7 +86,9 @@ def login_customer():
 
     customer = db.session.query(Customers).where(Customers.email == data["email"]).first()
 
-    if customer and check_password_hash(customer.password, data["password"]):
+    if customer and verify_password(customer.password, data["password"]):
+        if rehash_if_outdated(customer, data["password"]):
+            db.session.commit()
         token = create_customer_token(customer.id)
         return jsonify({
             "message": f"Login successful {customer.first_name} {customer.last_name}",
@@ -39,7 +109,7 @@ def create_customer():
     if existing_customer:
         return jsonify({"message": "Email already in use"}), 409
 
-    data['password'] = generate_password_hash(data['password'])
+    data['password'] = hash_password(data['password'])
     new_customer = Customers(**data)
     db.session.add(new_customer)
     db.session.commit()
@@ -47,12 +117,41 @@ def create_customer():
 
 #  =========================================================================
 
+@customers_bp.route('/import', methods=['POST'])
+@token_required
+@role_required(['admin'])
+def bulk_import_customers(user_id, role):
+    # Body is CSV (text/csv, header row first) or NDJSON (application/x-ndjson)
+    try:
+        result = import_customers(request.get_data(as_text=True), request.content_type)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return jsonify(result), 200
+
+
+@customers_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_customers_command(path):
+    """Import customers from a CSV or NDJSON (.ndjson/.jsonl) file."""
+    content_type = NDJSON_TYPES[0] if path.endswith(('.ndjson', '.jsonl')) else 'text/csv'
+    with open(path, encoding='utf-8') as f:
+        result = import_customers(f.read(), content_type)
+    for error in result['errors']:
+        click.echo(f"row {error['row']}: {error['errors']}", err=True)
+    click.echo(f"{result['created']} customers imported, {len(result['errors'])} rows rejected")
+
+#  =========================================================================
+
 @customers_bp.route('/', methods=['GET'])
 @token_required
 @role_required(['admin', 'customer', 'mechanic'])
 def get_customers(user_id, role):
-    customers = db.session.query(Customers).all()
-    return jsonify({"customers": customers_schema.dump(customers)}), 200
+    try:
+        fields = parse_fields(request.args.get('fields'), customer_list_fields)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    customers = read_rows(db.session, Customers, fields)
+    return jsonify({"customers": dump_rows(row_serializer(Customers, fields, mapping=True), customers)}), 200
 
 #  =========================================================================
 
@@ -95,7 +194,7 @@ def update_customer_without_id(user_id, role):
         return jsonify({"message": e.messages}), 400
 
     if 'password' in customer_data and customer_data['password']:
-        customer_data['password'] = generate_password_hash(customer_data['password'])
+        customer_data['password'] = hash_password(customer_data['password'])
 
     for key, value in customer_data.items():
         setattr(customer, key, value)
@@ -129,7 +228,7 @@ def update_customer_by_id(user_id, role, customer_id):
         return jsonify({"message": e.messages}), 400
 
     if 'password' in customer_data and customer_data['password']:
-        customer_data['password'] = generate_password_hash(customer_data['password'])
+        customer_data['password'] = hash_password(customer_data['password'])
 
     for key, value in customer_data.items():
         setattr(customer, key, value)
@@ -147,15 +246,89 @@ def update_customer_by_id(user_id, role, customer_id):
 
 #  =========================================================================
 
+def _flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def _dependents(customer_ids):
+    # Tickets and invoices that point at the given customers (a select or subquery of ids)
+    ticket_ids = select(Service_Ticket.id).where(Service_Ticket.customer_id.in_(customer_ids))
+    invoice_ids = select(Invoice.id).where(or_(Invoice.customer_id.in_(customer_ids),
+                                               Invoice.service_ticket_id.in_(ticket_ids)))
+    return ticket_ids, invoice_ids
+
+
+def _count_customer_deletion(cascade):
+    customer_ids = select(Customers.id)
+    ticket_ids, invoice_ids = _dependents(customer_ids)
+    count = lambda ids: db.session.scalar(select(func.count()).select_from(ids.subquery()))
+    counts = {"customers": count(customer_ids)}
+    if cascade:
+        counts["invoice_items"] = count(select(Invoice_Inventory_Link.invoice_id)
+                                        .where(Invoice_Inventory_Link.invoice_id.in_(invoice_ids)))
+        counts["invoices"] = count(invoice_ids)
+        counts["ticket_mechanics"] = count(select(Ticket_Mechanics.mechanic_id)
+                                           .where(Ticket_Mechanics.service_ticket_id.in_(ticket_ids)))
+        counts["service_tickets"] = count(ticket_ids)
+    else:
+        counts["service_tickets_detached"] = count(select(Service_Ticket.id).where(Service_Ticket.customer_id.in_(customer_ids)))
+        counts["invoices_detached"] = count(select(Invoice.id).where(Invoice.customer_id.in_(customer_ids)))
+    return counts
+
+
+def _delete_customer_chunk(customer_ids, cascade):
+    # One chunk as a handful of set-based statements, children first
+    sync = {"synchronize_session": False}
+    ticket_ids, invoice_ids = _dependents(customer_ids)
+    counts = Counter()
+    if cascade:
+        counts["invoice_items"] = db.session.execute(delete(Invoice_Inventory_Link).where(
+            Invoice_Inventory_Link.invoice_id.in_(invoice_ids)).execution_options(**sync)).rowcount
+        counts["invoices"] = db.session.execute(delete(Invoice).where(
+            Invoice.id.in_(invoice_ids)).execution_options(**sync)).rowcount
+        discount_service_tickets(db.session, Service_Ticket.id.in_(ticket_ids))
+        counts["ticket_mechanics"] = db.session.execute(delete(Ticket_Mechanics).where(
+            Ticket_Mechanics.service_ticket_id.in_(ticket_ids)).execution_options(**sync)).rowcount
+        counts["service_tickets"] = db.session.execute(delete(Service_Ticket).where(
+            Service_Ticket.id.in_(ticket_ids)).execution_options(**sync)).rowcount
+    else:
+        # Same outcome as the ORM delete: dependents stay, their customer_id is cleared
+        counts["service_tickets_detached"] = db.session.execute(update(Service_Ticket).where(
+            Service_Ticket.customer_id.in_(customer_ids)).values(customer_id=None).execution_options(**sync)).rowcount
+        counts["invoices_detached"] = db.session.execute(update(Invoice).where(
+            Invoice.customer_id.in_(customer_ids)).values(customer_id=None).execution_options(**sync)).rowcount
+    counts["customers"] = db.session.execute(delete(Customers).where(
+        Customers.id.in_(customer_ids)).execution_options(**sync)).rowcount
+    return counts
+
+
 @customers_bp.route('/', methods=['DELETE'], strict_slashes=False)
 @token_required
 @role_required(['admin'])
 def delete_all_customers(user_id, role):
-    customers = db.session.query(Customers).all()
-    for customer in customers:
-        db.session.delete(customer)
-    db.session.commit()
-    return jsonify({"message": "All customers deleted"}), 200
+    # ?dry_run=true only counts. ?cascade=true also deletes the customers' tickets and
+    # invoices instead of detaching them. Each chunk commits on its own so the write
+    # lock is released between chunks.
+    cascade = _flag('cascade')
+    if _flag('dry_run'):
+        return jsonify({"dry_run": True, "would_delete": _count_customer_deletion(cascade)}), 200
+
+    totals, chunks = Counter(), 0
+    while True:
+        customer_ids = db.session.scalars(
+            select(Customers.id).order_by(Customers.id).limit(DELETE_CHUNK_SIZE)).all()
+        if not customer_ids:
+            break
+        counts = _delete_customer_chunk(customer_ids, cascade)
+        db.session.commit()
+        if not counts["customers"]:
+            break
+        totals.update(counts)
+        chunks += 1
+        current_app.logger.info("delete_all_customers: chunk %d done, %d customers deleted so far",
+                                chunks, totals["customers"])
+    db.session.expire_all()
+    return jsonify({"message": "All customers deleted", "deleted": dict(totals), "chunks": chunks}), 200
 
 @customers_bp.route('/<int:customer_id>', methods=['DELETE'], strict_slashes=False)
 @token_required
@@ -1,6 +1,7 @@
 from app.extenstions import ma
 from app.models import Customers
 from marshmallow import fields
+from app.util.fieldsets import public_columns
 
 class  CustomerSchema(ma.SQLAlchemyAutoSchema):
     email = fields.Email(required=True)  
@@ -12,3 +13,5 @@ class  CustomerSchema(ma.SQLAlchemyAutoSchema):
 customer_schema = CustomerSchema()
 customers_schema = CustomerSchema(many=True)
 login_schema = CustomerSchema(only=["email", "password"])
+customer_import_schema = CustomerSchema(exclude=["id"])
+customer_list_fields = public_columns(Customers)
@@ -1,10 +1,14 @@
 from app.util.auth import role_required, token_required
 from . import inventory_bp
-from .schema import inventory_schema, inventories_schema
+from .schema import inventory_schema, inventory_row
 from flask import request, jsonify
 from marshmallow import ValidationError
-from app.models import InventoryItem, db, ItemsDescription
-from app.extenstions import limiter, cache
+from app.models import InventoryItem, db
+from app.extenstions import limiter, versioned_etag, cached_view
+from app.util.pagination import parse_limit
+from app.util.serializers import dump_rows
+from app.util.fieldsets import read_rows
+from app.util.search import search_item_descriptions, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
 
 
 
@@ -29,12 +33,13 @@ def create_inventory_item(user_id, role):
 
 @inventory_bp.route('/', methods=['GET'])
 # limiter left blank to use default limits
-@cache.cached(timeout=30)
 @token_required
 @role_required(['admin', 'mechanic'])
+@versioned_etag(InventoryItem.__tablename__)
+@cached_view(InventoryItem.__tablename__)
 def get_inventory_items(user_id, role):
-    inventory_items = db.session.query(InventoryItem).all()
-    return inventories_schema.jsonify(inventory_items), 200
+    inventory_items = read_rows(db.session, InventoryItem)
+    return jsonify(dump_rows(inventory_row, inventory_items)), 200
 
 #  =========================================================================
 
@@ -92,23 +97,14 @@ def update_inventory_item(user_id, role, id):
 def search_inventory_items(user_id, role):
     part_name = request.args.get('part_name')
     part_description = request.args.get('part_description')
-    
-    query = db.session.query(ItemsDescription)
-    
-    if part_name:
-        query = query.filter(ItemsDescription.part_name.ilike(f'%{part_name}%'))
-    if part_description:
-        query = query.filter(ItemsDescription.part_description.ilike(f'%{part_description}%'))
-    
-    results = query.all()
-    items = [
-        {
-            "id": item.id,
-            "part_name": item.part_name,
-            "part_description": item.part_description,
-            
-        } for item in results
-    ]
+    try:
+        limit = parse_limit(request.args.get('limit'), default=DEFAULT_SEARCH_LIMIT, maximum=MAX_SEARCH_LIMIT)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Full-text index lookup ranked by relevance (FTS5 on SQLite, GIN tsvector on Postgres)
+    results = search_item_descriptions(db.session, part_name, part_description, limit)
+    items = [dict(item) for item in results]
     
     return jsonify(items), 200
 
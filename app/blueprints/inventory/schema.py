@@ -1,5 +1,6 @@
 from app.extenstions import ma
 from app.models import InventoryItem
+from app.util.serializers import row_serializer
 
 class InventorySchema(ma.SQLAlchemyAutoSchema):
    
@@ -9,3 +10,4 @@ class InventorySchema(ma.SQLAlchemyAutoSchema):
         
 inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
+inventory_row = row_serializer(InventoryItem, mapping=True)
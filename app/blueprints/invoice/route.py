@@ -1,10 +1,63 @@
 from app.util.auth import role_required, token_required
 from . import invoice_bp
-from .schema import invoice_schema, invoices_schema
+from .schema import invoice_schema, invoice_items_schema, invoice_row
 from flask import request, jsonify
 from marshmallow import ValidationError
-from app.models import Invoice, Invoice_Inventory_Link, db, InventoryItem
-from app.extenstions import limiter, cache
+from app.models import Invoice, Invoice_Inventory_Link, db, InventoryItem, ItemsDescription
+from app.extenstions import limiter, versioned_etag, cached_view
+from sqlalchemy import func, select, update
+from app.util.dml import upsert_increment
+from app.util.serializers import dump_rows
+from app.util.fieldsets import read_rows
+from collections import Counter
+
+MAX_TOTALS_BATCH = 500
+
+# Line totals depend on the links, the parts they point at and the part prices
+TOTALS_TABLES = (Invoice.__tablename__, Invoice_Inventory_Link.__tablename__,
+                 InventoryItem.__tablename__, ItemsDescription.__tablename__)
+
+
+def _increment_line_quantity(invoice_id, inventory_item_id, quantity):
+    # UPDATE ... SET quantity = quantity + :n on one line item. Returns the new quantity,
+    # or None when the invoice has no such line yet (rowcount 0).
+    link = Invoice_Inventory_Link.__table__
+    stmt = (update(link)
+            .where(link.c.invoice_id == invoice_id, link.c.inventory_item_id == inventory_item_id)
+            .values(quantity=link.c.quantity + quantity))
+    if db.session.get_bind().dialect.update_returning:
+        return db.session.execute(stmt.returning(link.c.quantity)).scalar()
+    if db.session.execute(stmt).rowcount == 0:
+        return None
+    return db.session.scalar(select(link.c.quantity).where(
+        link.c.invoice_id == invoice_id, link.c.inventory_item_id == inventory_item_id))
+
+
+def _invoice_totals(invoice_ids):
+    # One aggregate over invoices -> links -> inventory -> items_description. The outer
+    # joins keep invoices without line items (total 0); ids missing from the result don't exist.
+    line_total = ItemsDescription.part_price * Invoice_Inventory_Link.quantity
+    stmt = (select(Invoice.id,
+                   Invoice.price,
+                   func.count(Invoice_Inventory_Link.inventory_item_id).label('line_items'),
+                   func.coalesce(func.sum(Invoice_Inventory_Link.quantity), 0).label('quantity'),
+                   func.coalesce(func.sum(line_total), 0).label('parts_total'))
+            .outerjoin(Invoice_Inventory_Link, Invoice_Inventory_Link.invoice_id == Invoice.id)
+            .outerjoin(InventoryItem, InventoryItem.id == Invoice_Inventory_Link.inventory_item_id)
+            .outerjoin(ItemsDescription, ItemsDescription.id == InventoryItem.items_description_id)
+            .where(Invoice.id.in_(invoice_ids))
+            .group_by(Invoice.id)
+            .order_by(Invoice.id))
+    return {
+        row.id: {
+            "invoice_id": row.id,
+            "price": row.price,
+            "line_items": row.line_items,
+            "quantity": row.quantity,
+            "parts_total": round(row.parts_total, 2),
+        }
+        for row in db.session.execute(stmt)
+    }
 
 
 
@@ -28,12 +81,13 @@ def create_invoice(user_id, role):
 #  =========================================================================
 @invoice_bp.route('/', methods=['GET'])
 # limiter left blank to use default limits
-@cache.cached(timeout=30)
 @token_required
 @role_required(['admin', 'mechanic'])
+@versioned_etag(Invoice.__tablename__)
+@cached_view(Invoice.__tablename__)
 def get_invoices(user_id, role):
-    invoices = db.session.query(Invoice).all()
-    return invoices_schema.jsonify(invoices), 200
+    invoices = read_rows(db.session, Invoice)
+    return jsonify(dump_rows(invoice_row, invoices)), 200
 
 #  =========================================================================
 
@@ -47,6 +101,43 @@ def get_invoice(user_id, role, id):
 
 #  =========================================================================
 
+@invoice_bp.route('/totals', methods=['GET'])
+@limiter.limit("30 per hour", override_defaults=True)
+@token_required
+@role_required(['admin', 'mechanic'])
+@cached_view(*TOTALS_TABLES)
+def get_invoice_totals(user_id, role):
+    # ?ids=1,2,3 -- totals for a whole billing screen in a single query
+    try:
+        invoice_ids = sorted({int(i) for i in request.args.get('ids', '').split(',') if i.strip()})
+    except ValueError:
+        return jsonify({"message": "ids must be a comma separated list of integers"}), 400
+    if not invoice_ids:
+        return jsonify({"message": "ids is required"}), 400
+    if len(invoice_ids) > MAX_TOTALS_BATCH:
+        return jsonify({"message": f"At most {MAX_TOTALS_BATCH} invoices per request"}), 400
+
+    totals = _invoice_totals(invoice_ids)
+    return jsonify({
+        "totals": list(totals.values()),
+        "not_found": [i for i in invoice_ids if i not in totals]
+    }), 200
+
+#  =========================================================================
+
+@invoice_bp.route('/<int:id>/total', methods=['GET'])
+@limiter.limit("30 per hour", override_defaults=True)
+@token_required
+@role_required(['admin', 'mechanic'])
+@cached_view(*TOTALS_TABLES)
+def get_invoice_total(user_id, role, id):
+    total = _invoice_totals([id]).get(id)
+    if not total:
+        return jsonify({"message": "Invoice not found"}), 404
+    return jsonify(total), 200
+
+#  =========================================================================
+
 @invoice_bp.route('/<int:id>', methods=['DELETE'])
 @limiter.limit("5 per hour", override_defaults=True)
 @token_required
@@ -90,12 +181,7 @@ def update_invoice(user_id, role, id):
 @token_required
 @role_required(['admin', 'mechanic'])
 def add_invoice_item(user_id, role, invoice_id):
-    invoice = db.session.query(Invoice).get(invoice_id)
-    if not invoice:
-        return jsonify({"message": "Invoice not found"}), 404
-
-    data = request.json
-    quantity = data.get("quantity", 1)  
+    data = request.json or {}
 
     try:
         inventory_item_id = int(data.get("inventory_item_id"))
@@ -103,39 +189,78 @@ def add_invoice_item(user_id, role, invoice_id):
         return jsonify({"message": "inventory_item_id must be an integer"}), 400
 
     try:
-        quantity = int(quantity)
+        quantity = int(data.get("quantity", 1))
     except (TypeError, ValueError):
         return jsonify({"message": "quantity must be an integer"}), 400
-    
-    
-    if not inventory_item_id:
-        return jsonify({"message": "inventory_item_id is required"}), 400
-
-    inventory_item = db.session.query(InventoryItem).get(inventory_item_id)
-    if not inventory_item:
-        return jsonify({"message": "Inventory item not found"}), 404
-
-    
-    link = db.session.query(Invoice_Inventory_Link).filter_by(
-        invoice_id=invoice_id, inventory_item_id=inventory_item_id).first()
-    
-    if link:
-        
-        link.quantity += quantity
-    else:
-       
-        link = Invoice_Inventory_Link(invoice=invoice, inventory_item=inventory_item, quantity=quantity)
-        db.session.add(link)
+    if quantity < 1:
+        return jsonify({"message": "quantity must be a positive integer"}), 400
+
+    # Existing line: increment in the database so concurrent adds cannot lose an update
+    new_quantity = _increment_line_quantity(invoice_id, inventory_item_id, quantity)
+    if new_quantity is None:
+        if db.session.get(Invoice, invoice_id) is None:
+            return jsonify({"message": "Invoice not found"}), 404
+        if db.session.get(InventoryItem, inventory_item_id) is None:
+            return jsonify({"message": "Inventory item not found"}), 404
+        # New line; the upsert still adds up if another request inserted it meanwhile
+        row = {"invoice_id": invoice_id, "inventory_item_id": inventory_item_id, "quantity": quantity}
+        upsert_increment(db.session, Invoice_Inventory_Link.__table__, ['invoice_id', 'inventory_item_id'],
+                         'quantity', [row])
+        new_quantity = db.session.scalar(select(Invoice_Inventory_Link.quantity).where(
+            Invoice_Inventory_Link.invoice_id == invoice_id,
+            Invoice_Inventory_Link.inventory_item_id == inventory_item_id))
 
     db.session.commit()
 
     return jsonify({
         "message": f"Inventory item {inventory_item_id} added to invoice {invoice_id}",
-        "quantity": link.quantity
+        "quantity": new_quantity
     }), 201 
 
 #  =========================================================================
 
+@invoice_bp.route('/<int:invoice_id>/add_invoice_items', methods=['POST'])
+@limiter.limit("20 per hour", override_defaults=True)
+@token_required
+@role_required(['admin', 'mechanic'])
+def add_invoice_items(user_id, role, invoice_id):
+    # {"items": [{"inventory_item_id": 1, "quantity": 2}, ...]} -- a whole job in one call
+    try:
+        data = invoice_items_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    if db.session.get(Invoice, invoice_id) is None:
+        return jsonify({"message": "Invoice not found"}), 404
+
+    # Repeated ids are summed up front: one upsert row per key
+    quantities = Counter()
+    for item in data['items']:
+        quantities[item['inventory_item_id']] += item['quantity']
+
+    found = set(db.session.scalars(select(InventoryItem.id).where(InventoryItem.id.in_(quantities))))
+    missing = sorted(set(quantities) - found)
+    if missing:
+        return jsonify({"message": "Inventory items not found", "not_found": missing}), 404
+
+    rows = [{"invoice_id": invoice_id, "inventory_item_id": item_id, "quantity": quantity}
+            for item_id, quantity in sorted(quantities.items())]
+    upsert_increment(db.session, Invoice_Inventory_Link.__table__, ['invoice_id', 'inventory_item_id'],
+                     'quantity', rows)
+    db.session.commit()
+
+    links = db.session.execute(
+        select(Invoice_Inventory_Link.inventory_item_id, Invoice_Inventory_Link.quantity)
+        .where(Invoice_Inventory_Link.invoice_id == invoice_id,
+               Invoice_Inventory_Link.inventory_item_id.in_(quantities))
+        .order_by(Invoice_Inventory_Link.inventory_item_id))
+    return jsonify({
+        "message": f"{len(rows)} inventory items added to invoice {invoice_id}",
+        "items": [{"inventory_item_id": link.inventory_item_id, "quantity": link.quantity} for link in links]
+    }), 201
+
+#  =========================================================================
+
 @invoice_bp.route('/<int:invoice_id>/delete_invoice_item/<int:inventory_item_id>', methods=['DELETE'])
 @limiter.limit("5 per hour", override_defaults=True)
 @token_required
@@ -1,5 +1,9 @@
 from app.extenstions import ma
 from app.models import Invoice
+from app.util.serializers import row_serializer
+from marshmallow import fields, validate
+
+MAX_LINE_ITEMS = 200
 
 class InvoiceSchema(ma.SQLAlchemyAutoSchema):
    
@@ -8,4 +12,17 @@ class InvoiceSchema(ma.SQLAlchemyAutoSchema):
         include_fk = True
         
 invoice_schema = InvoiceSchema()
-invoices_schema = InvoiceSchema(many=True)
\ No newline at end of file
+invoices_schema = InvoiceSchema(many=True)
+invoice_row = row_serializer(Invoice, mapping=True)
+
+
+class InvoiceItemSchema(ma.Schema):
+    inventory_item_id = fields.Integer(required=True, strict=True)
+    quantity = fields.Integer(load_default=1, strict=True, validate=validate.Range(min=1))
+
+
+class InvoiceItemsSchema(ma.Schema):
+    items = fields.List(fields.Nested(InvoiceItemSchema), required=True,
+                        validate=validate.Length(min=1, max=MAX_LINE_ITEMS))
+
+invoice_items_schema = InvoiceItemsSchema()
@@ -1,10 +1,12 @@
 from app.util.auth import role_required, token_required
 from . import item_descriptions_bp
-from .schema import item_description_schema, item_descriptions_schema
+from .schema import item_description_schema, item_description_row
 from flask import request, jsonify
 from marshmallow import ValidationError
-from app.models import InventoryItem, ItemsDescription, db
-from app.extenstions import limiter, cache
+from app.models import ItemsDescription, db
+from app.extenstions import limiter, versioned_etag, cached_view
+from app.util.serializers import dump_rows
+from app.util.fieldsets import read_rows
 
 
 
@@ -33,12 +35,13 @@ def create_item_description(user_id, role):
 
 @item_descriptions_bp.route('/', methods=['GET'])
 # limiter left blank to use default limits
-@cache.cached(timeout=30)
 @token_required
 @role_required(['admin'])
+@versioned_etag(ItemsDescription.__tablename__)
+@cached_view(ItemsDescription.__tablename__)
 def get_item_descriptions(role, user_id):
-    item_descriptions_bp = db.session.query(ItemsDescription).all()
-    return item_descriptions_schema.jsonify(item_descriptions_bp), 200
+    item_descriptions_bp = read_rows(db.session, ItemsDescription)
+    return jsonify(dump_rows(item_description_row, item_descriptions_bp)), 200
 
 #  =========================================================================
 
@@ -74,18 +77,18 @@ def delete_item_description(user_id, role, id):
 @token_required
 @role_required(['admin'])
 def update_item_descriptions(user_id, role, id):
-    inventory_item = db.session.query(InventoryItem).where(InventoryItem.id==id).first()
-    if not inventory_item:
-        return jsonify({"message": "Inventory item not found"}), 404
+    item_description = db.session.query(ItemsDescription).where(ItemsDescription.id==id).first()
+    if not item_description:
+        return jsonify({"message": "Item description not found"}), 404
     try:
         item_description_data = item_description_schema.load(request.json)
     except ValidationError as e: 
         return jsonify(e.messages),400
     for key, value in item_description_data.items():
-        setattr(inventory_item, key, value)
+        setattr(item_description, key, value)
     
     db.session.commit()
-    return item_description_schema.jsonify(inventory_item), 200
+    return item_description_schema.jsonify(item_description), 200
 
 #  =========================================================================
 
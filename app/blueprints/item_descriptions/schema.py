@@ -1,5 +1,6 @@
 from app.extenstions import ma
 from app.models import ItemsDescription
+from app.util.serializers import row_serializer
 
 class Item_Description(ma.SQLAlchemyAutoSchema):
    
@@ -8,4 +9,5 @@ class Item_Description(ma.SQLAlchemyAutoSchema):
         include_fk = True
         
 item_description_schema = Item_Description()
-item_descriptions_schema = Item_Description(many=True)
\ No newline at end of file
+item_descriptions_schema = Item_Description(many=True)
+item_description_row = row_serializer(ItemsDescription, mapping=True)
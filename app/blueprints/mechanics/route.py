@@ -1,13 +1,18 @@
 from . import mechanics_bp
-from .schema import mechanic_schema, mechanics_schema, login_schema
+from .schema import mechanic_schema, login_schema, mechanic_list_fields
 from flask import request, jsonify, current_app
 import traceback
 from marshmallow import ValidationError
-from app.models import Mechanics, db
-from app.extenstions import limiter, cache
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.models import Mechanics, Ticket_Mechanics, Mechanic_Ticket_Daily, db
+from app.extenstions import limiter, cached_per_user, cached_view
+from app.util.passwords import hash_password, verify_password, rehash_if_outdated, PasswordHashingBusy
 from app.util.auth import role_required, token_required, create_admin_token, create_mechanic_token
 from sqlalchemy.exc import IntegrityError
+from app.util.fieldsets import parse_fields, read_rows
+from app.util.serializers import row_serializer, dump_rows
+from sqlalchemy import delete
+
+PROTECTED_MECHANIC_ID = 1
 
 # Blueprint-level exception handler so blueprint errors always return JSON
 @mechanics_bp.errorhandler(Exception)
@@ -51,7 +56,9 @@ def login_mechanics():
         # Use filter() for clarity and portability
         mechanics = db.session.query(Mechanics).filter(Mechanics.email == identifier).first()
 
-        if mechanics and check_password_hash(mechanics.password, password):
+        if mechanics and verify_password(mechanics.password, password):
+            if rehash_if_outdated(mechanics, password):
+                db.session.commit()
             is_admin_flag = bool(getattr(mechanics, "is_admin", False))
             token = create_admin_token(mechanics.id) if is_admin_flag else create_mechanic_token(mechanics.id)
 
@@ -64,6 +71,8 @@ def login_mechanics():
 
         return jsonify({"message": "Invalid email or password"}), 403
 
+    except PasswordHashingBusy:
+        raise
     except Exception as exc:
         current_app.logger.exception("Unhandled error in login_mechanics")
         tb = traceback.format_exc()
@@ -85,13 +94,13 @@ def create_mechanic():
     if existing_mechanic:
         return jsonify({"message": "Email already in use"}), 409
 
-    data['password'] = generate_password_hash(data['password'])
+    data['password'] = hash_password(data['password'])
     # Ensure is_admin defaults to False if not provided
     data.setdefault('is_admin', False)
     new_mechanic = Mechanics(**data)
     db.session.add(new_mechanic)
     db.session.commit()
-    print(f"New mechanic was created, Hello: {new_mechanic.first_name} {new_mechanic.last_name}")
+    current_app.logger.info("Mechanic created: id=%s", new_mechanic.id)
     return mechanic_schema.jsonify(new_mechanic), 201
 
 #  =========================================================================
@@ -99,22 +108,25 @@ def create_mechanic():
 @mechanics_bp.route('/', methods=['GET'])
 @token_required
 @role_required(['admin'])
-@cache.cached(timeout=30)
+@cached_view(Mechanics.__tablename__)
 def get_mechanics(user_id, role):
-    mechanics = db.session.query(Mechanics).all()
-    return mechanics_schema.jsonify(mechanics), 200
+    try:
+        fields = parse_fields(request.args.get('fields'), mechanic_list_fields)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    mechanics = read_rows(db.session, Mechanics, fields)
+    return jsonify(dump_rows(row_serializer(Mechanics, fields, mapping=True), mechanics)), 200
 
 #  =========================================================================
 
 @mechanics_bp.route('/profile', methods=['GET'])
 @token_required
 @role_required(['admin', 'mechanic'])
-@cache.cached(timeout=30)
+@cached_per_user(timeout=300, tables=(Mechanics.__tablename__,))
 def get_mechanic(user_id, role):
     mechanic = db.session.get(Mechanics, user_id)
     if not mechanic:
         return jsonify({"message": "Mechanic not found"}), 404
-    print(f"Mechanic found: {mechanic.first_name} {mechanic.last_name}")
     return mechanic_schema.jsonify(mechanic), 200
 
 #  =========================================================================
@@ -154,7 +166,7 @@ def update_mechanic(user_id, role, mech_id):
 
     # Hash password if present
     if 'password' in mech_data and mech_data['password']:
-        mech_data['password'] = generate_password_hash(mech_data['password'])
+        mech_data['password'] = hash_password(mech_data['password'])
 
     # Prevent downgrading admin flag by non-admins
     if role != 'admin' and 'is_admin' in mech_data:
@@ -216,20 +228,24 @@ def update_all_mechanics(user_id, role):
 @token_required
 @role_required(['admin'])
 def delete_all_mechanics(user_id, role):
-    # Do not allow deleting the protected mechanic with id == 1.
-    mechanics = db.session.query(Mechanics).all()
-    to_delete = [m for m in mechanics if int(getattr(m, 'id', 0)) != 1]
-    protected_present = any(int(getattr(m, 'id', 0)) == 1 for m in mechanics)
-
-    if not to_delete:
-        msg = "No mechanics deleted. Protected mechanic preserved." if protected_present else "No mechanics found to delete."
-        return jsonify({"message": msg}), 200
-
-    deleted_count = 0
-    for mech in to_delete:
-        db.session.delete(mech)
-        deleted_count += 1
+    # Do not allow deleting the protected mechanic with id == 1. Assignments go first,
+    # then the mechanics, as set-based statements in one transaction.
+    sync = {"synchronize_session": False}
+    protected_present = db.session.get(Mechanics, PROTECTED_MECHANIC_ID) is not None
+    unassigned = db.session.execute(delete(Ticket_Mechanics).where(
+        Ticket_Mechanics.mechanic_id != PROTECTED_MECHANIC_ID).execution_options(**sync)).rowcount
+    # Normally emptied by the ticket_mechanics triggers already; clears anything left over
+    db.session.execute(delete(Mechanic_Ticket_Daily).where(
+        Mechanic_Ticket_Daily.mechanic_id != PROTECTED_MECHANIC_ID).execution_options(**sync))
+    deleted_count = db.session.execute(delete(Mechanics).where(
+        Mechanics.id != PROTECTED_MECHANIC_ID).execution_options(**sync)).rowcount
     db.session.commit()
+    db.session.expire_all()
 
-    msg = f"Deleted {deleted_count} mechanics. Protected mechanic (id=1) preserved." if protected_present else f"Deleted {deleted_count} mechanics."
-    return jsonify({"message": msg}), 200
+    if not deleted_count:
+        msg = "No mechanics deleted. Protected mechanic preserved." if protected_present else "No mechanics found to delete."
+    elif protected_present:
+        msg = f"Deleted {deleted_count} mechanics. Protected mechanic (id=1) preserved."
+    else:
+        msg = f"Deleted {deleted_count} mechanics."
+    return jsonify({"message": msg, "deleted": deleted_count, "unassigned": unassigned}), 200
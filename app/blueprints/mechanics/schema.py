@@ -1,6 +1,7 @@
 from app.extenstions import ma
 from app.models import Mechanics
 from marshmallow import fields
+from app.util.fieldsets import public_columns
 
 class MechanicsSchema(ma.SQLAlchemyAutoSchema):
     email = fields.Email(required=True)  # Enforce email format
@@ -11,4 +12,5 @@ class MechanicsSchema(ma.SQLAlchemyAutoSchema):
         
 mechanic_schema = MechanicsSchema()
 mechanics_schema = MechanicsSchema(many=True)
-login_schema = MechanicsSchema(only=["email", "password"])
\ No newline at end of file
+login_schema = MechanicsSchema(only=["email", "password"])
+mechanic_list_fields = public_columns(Mechanics)
@@ -1,11 +1,19 @@
 from . import service_tickets_bp
-from .schema import service_ticket_schema, service_tickets_schema
-from flask import request, jsonify
+from .schema import service_ticket_schema, service_ticket_row
+from flask import request, jsonify, Response, stream_with_context, current_app
 from marshmallow import ValidationError
 from app.models import Mechanics, Service_Ticket, db
-from app.extenstions import limiter,cache
+from app.extenstions import limiter, versioned_etag, cached_view
 from app.util.auth import token_required, role_required 
-from sqlalchemy import func
+from app.util.pagination import parse_limit, keyset_by_date
+from app.util.summaries import popular_services
+from app.util.serializers import dump_rows
+from datetime import date
+import json
+
+EXPORT_BATCH_SIZE = 1000
+POPULAR_DEFAULT_LIMIT = 3
+POPULAR_MAX_LIMIT = 50
 
  #  =========================================================================
  
@@ -20,7 +28,7 @@ def create_service_ticket():
     new_service = Service_Ticket(**data)
     db.session.add(new_service)
     db.session.commit()
-    print(f"New Service ticket was created : For Customer {new_service.customer_id}")
+    current_app.logger.info("Service ticket created: id=%s customer_id=%s", new_service.id, new_service.customer_id)
     return service_ticket_schema.jsonify(new_service), 201
 
  #  =========================================================================
@@ -28,23 +36,35 @@ def create_service_ticket():
 
 @service_tickets_bp.route('/', methods=['GET'])
 @limiter.limit("50 per hour")
-@cache.cached(timeout=30)
 @token_required
 @role_required(['admin', 'mechanic'])
+@versioned_etag(Service_Ticket.__tablename__)
+@cached_view(Service_Ticket.__tablename__)
 def get_service_tickets(user_id, role):
-    service_tickets = db.session.query(Service_Ticket).all()
-    return service_tickets_schema.jsonify(service_tickets), 200
+    # Keyset pagination on (service_date, id): every page is a bounded range scan
+    # regardless of how deep the client has paged.
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        service_tickets, next_cursor = keyset_by_date(
+            db.session.query(Service_Ticket), Service_Ticket.service_date, Service_Ticket.id,
+            limit, request.args.get('after'))
+    except ValueError:
+        return jsonify({"message": "Invalid limit or cursor"}), 400
+
+    return jsonify({
+        "service_tickets": dump_rows(service_ticket_row, service_tickets),
+        "next_cursor": next_cursor
+    }), 200
 
  #  =========================================================================
 
 @service_tickets_bp.route('/<int:service_tickets_id>', methods=['GET'])
 @limiter.limit("50 per hour")
-@cache.cached(timeout=30)
 @token_required
 @role_required(['admin', 'mechanic'])
+@cached_view(Service_Ticket.__tablename__)
 def get_service_ticket(user_id, role, service_tickets_id):
     service_ticket = db.session.get(Service_Ticket, service_tickets_id) 
-    print(f"Service Ticket found: {service_tickets_id}")
     return service_ticket_schema.jsonify(service_ticket), 200
 
  #  =========================================================================
@@ -87,15 +107,19 @@ def update_service_ticket(user_id, role, service_ticket_id):
 
 @service_tickets_bp.route('/popular', methods=['GET'])
 @limiter.limit("10 per hour")
-@cache.cached(timeout=30)  
 @token_required
 @role_required(['admin'])
+@cached_view(Service_Ticket.__tablename__)
 def popular_service_tickets(user_id, role):
-    
-    popular_tickets = (
-        db.session.query(Service_Ticket.service_description,func.count(Service_Ticket.id).label('usage_count'))
-        .group_by(Service_Ticket.service_description)
-        .order_by(func.count(Service_Ticket.id).desc()).limit(3).all())
+    try:
+        limit = parse_limit(request.args.get('limit'), default=POPULAR_DEFAULT_LIMIT, maximum=POPULAR_MAX_LIMIT)
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"message": "limit must be a positive integer and from/to dates in YYYY-MM-DD format"}), 400
+
+    # Reads the pre-aggregated service_popularity summaries instead of grouping every ticket
+    popular_tickets = popular_services(db.session, limit, date_from, date_to)
 
     ticket_data = [
         {"service_description": ticket.service_description,"usage_count": ticket.usage_count}
@@ -103,3 +127,35 @@ def popular_service_tickets(user_id, role):
     
     return jsonify(ticket_data), 200
 
+# ==========================================================================
+
+@service_tickets_bp.route('/export', methods=['GET'])
+@limiter.limit("10 per hour")
+@token_required
+@role_required(['admin'])
+def export_service_tickets(user_id, role):
+    # Stream every ticket as newline-delimited JSON. Rows are pulled from a server-side
+    # cursor in batches, so memory stays flat and the first line is sent before the
+    # query has finished.
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"message": "from and to must be dates in YYYY-MM-DD format"}), 400
+
+    query = db.session.query(Service_Ticket)
+    if date_from:
+        query = query.filter(Service_Ticket.service_date >= date_from)
+    if date_to:
+        query = query.filter(Service_Ticket.service_date <= date_to)
+    query = (query.order_by(Service_Ticket.id)
+             .execution_options(stream_results=True)
+             .yield_per(EXPORT_BATCH_SIZE))
+
+    def generate():
+        for service_ticket in query:
+            yield json.dumps(service_ticket_row(service_ticket)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+        "Content-Disposition": "attachment; filename=service_tickets.ndjson"
+    })
@@ -1,5 +1,6 @@
 from app.extenstions import ma
 from app.models import Service_Ticket
+from app.util.serializers import row_serializer
 
 
 
@@ -9,4 +10,5 @@ class Service_TicketSchema(ma.SQLAlchemyAutoSchema):
         include_fk = True
        
 service_ticket_schema = Service_TicketSchema()
-service_tickets_schema = Service_TicketSchema(many=True)
\ No newline at end of file
+service_tickets_schema = Service_TicketSchema(many=True)
+service_ticket_row = row_serializer(Service_Ticket)
@@ -2,12 +2,22 @@ from select import select
 from app.blueprints import customers
 from app.util.auth import role_required, token_required
 from . import ticket_mechanics_bp
-from .schema import ticket_mechanic_schema, ticket_mechanics_schema
-from flask import request, jsonify
+from .schema import ticket_mechanic_schema, ticket_mechanic_row
+from flask import request, jsonify, current_app
 from marshmallow import ValidationError
 from app.models import Customers, Ticket_Mechanics, Service_Ticket, Mechanics, db
-from app.extenstions import limiter, cache
-from sqlalchemy import func
+from app.extenstions import limiter, cached_per_user, versioned_etag, cached_view
+from sqlalchemy import and_, delete
+from sqlalchemy.orm import selectinload, load_only
+from app.util.pagination import parse_limit, keyset_by_date
+from app.util.dml import insert_ignore
+from app.util.summaries import mechanic_leaderboard
+from app.util.serializers import dump_rows
+from app.util.fieldsets import read_rows
+from datetime import date
+
+LEADERBOARD_DEFAULT_LIMIT = 3
+LEADERBOARD_MAX_LIMIT = 50
 
  #  =========================================================================
  
@@ -24,19 +34,20 @@ def create_ticket_mechanic(user_id, role):
     new_ticket_mechanic = Ticket_Mechanics(**data)
     db.session.add(new_ticket_mechanic)
     db.session.commit()
-    print(f"New Ticket was created:  ")
+    current_app.logger.info("Mechanic %s assigned to ticket %s", new_ticket_mechanic.mechanic_id, new_ticket_mechanic.service_ticket_id)
     return ticket_mechanic_schema.jsonify(new_ticket_mechanic), 201
 
  #  =========================================================================
 
 @ticket_mechanics_bp.route('/', methods=['GET'])
 @limiter.limit("50 per hour", override_defaults=True)
-@cache.cached(timeout=20)
 @token_required
 @role_required(['admin'])
+@versioned_etag(Ticket_Mechanics.__tablename__)
+@cached_view(Ticket_Mechanics.__tablename__)
 def get_ticket_mechanics(user_id, role):
-    ticket_mechanics = db.session.query(Ticket_Mechanics).all()
-    return ticket_mechanics_schema.jsonify(ticket_mechanics), 200
+    ticket_mechanics = read_rows(db.session, Ticket_Mechanics)
+    return jsonify(dump_rows(ticket_mechanic_row, ticket_mechanics)), 200
 
  #  =========================================================================
 
@@ -45,12 +56,13 @@ def get_ticket_mechanics(user_id, role):
 @token_required
 @role_required(['admin'])
 def get_ticket_mechanic(service_ticket_id, role, user_id):
-    ticket_mechanics = db.session.query(Ticket_Mechanics).filter_by(service_ticket_id=service_ticket_id).all()
+    ticket_mechanics = read_rows(db.session, Ticket_Mechanics,
+                                 where=[Ticket_Mechanics.service_ticket_id == service_ticket_id])
  
     if not ticket_mechanics:
         return jsonify({"message": "ticket_mechanic not found"}), 404
     
-    return ticket_mechanics_schema.jsonify(ticket_mechanics), 200
+    return jsonify(dump_rows(ticket_mechanic_row, ticket_mechanics)), 200
 
  #  =========================================================================
 
@@ -85,29 +97,57 @@ def update_ticket_mechanic(user_id, role, service_ticket, mechanic_id):
             continue
         setattr(ticket_mechanic, key, value)
     db.session.commit()
-    print(f"ticket updated: ({service_ticket}, {mechanic_id})")
+    current_app.logger.info("Ticket mechanic updated: (%s, %s)", service_ticket, mechanic_id)
     return ticket_mechanic_schema.jsonify(ticket_mechanic), 200
 
 # ======================================================================
 
+def _requested_mechanic_ids():
+    mechanic_ids = (request.get_json(silent=True) or {}).get("mechanic_ids", [])
+    if not isinstance(mechanic_ids, list):
+        raise ValueError("mechanic_ids must be a list of integers")
+    try:
+        return sorted({int(mech_id) for mech_id in mechanic_ids})
+    except (TypeError, ValueError):
+        raise ValueError("mechanic_ids must be a list of integers")
+
+
 @ticket_mechanics_bp.route('/<int:ticket_id>/assign_mechanics', methods=['POST'])
 @token_required
 @role_required(['admin'])
 def assign_mechanics(user_id, role,ticket_id):
-    ticket = db.session.get(Service_Ticket, ticket_id)
-    if not ticket:
-        return jsonify({"message": "Ticket not found"}), 404
-    mechanic_ids = request.json.get("mechanic_ids", [])
+    try:
+        mechanic_ids = _requested_mechanic_ids()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     if not mechanic_ids:
         return jsonify({"message": "No mechanics provided"}), 400
+    if not db.session.query(Service_Ticket.id).filter_by(id=ticket_id).first():
+        return jsonify({"message": "Ticket not found"}), 404
+
+    # One IN lookup tells us which ids exist and which are already on the ticket
+    rows = (
+        db.session.query(Mechanics.id, Ticket_Mechanics.mechanic_id)
+        .outerjoin(Ticket_Mechanics, and_(Ticket_Mechanics.mechanic_id == Mechanics.id,
+                                          Ticket_Mechanics.service_ticket_id == ticket_id))
+        .filter(Mechanics.id.in_(mechanic_ids))
+        .all())
+    found = {row[0] for row in rows}
+    already_assigned = sorted(row[0] for row in rows if row[1] is not None)
+    to_assign = sorted(found.difference(already_assigned))
 
-    for mech_id in mechanic_ids:
-        mechanic = db.session.get(Mechanics, mech_id)
-        if mechanic and mechanic not in ticket.mechanics:
-            ticket.mechanics.append(mechanic)
-    print(f"Mechanics assigned to ticket {ticket_id}: {mechanic_ids}")
+    if to_assign:
+        # Single multi-row insert; a concurrent assignment of the same pair is ignored
+        db.session.execute(
+            insert_ignore(db.session, Ticket_Mechanics.__table__)
+            .values([{"service_ticket_id": ticket_id, "mechanic_id": mech_id} for mech_id in to_assign]))
     db.session.commit()
-    return ticket_mechanic_schema.jsonify(ticket), 200
+    return jsonify({
+        "service_ticket_id": ticket_id,
+        "assigned": to_assign,
+        "already_assigned": already_assigned,
+        "not_found": sorted(set(mechanic_ids).difference(found))
+    }), 200
 
 #==========================================================================
 
@@ -115,21 +155,28 @@ def assign_mechanics(user_id, role,ticket_id):
 @token_required
 @role_required(['admin'])
 def unassign_mechanics(user_id, role, ticket_id):
-    ticket = db.session.get(Service_Ticket, ticket_id)
-    if not ticket:
-        return jsonify({"message": "Ticket not found"}), 404
-
-    mechanic_ids = request.json.get("mechanic_ids", [])
+    try:
+        mechanic_ids = _requested_mechanic_ids()
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     if not mechanic_ids:
         return jsonify({"message": "No mechanics provided"}), 400
+    if not db.session.query(Service_Ticket.id).filter_by(id=ticket_id).first():
+        return jsonify({"message": "Ticket not found"}), 404
 
-    for mech_id in mechanic_ids:
-        mechanic = db.session.get(Mechanics, mech_id)
-        if mechanic and mechanic in ticket.mechanics:
-            ticket.mechanics.remove(mechanic)
-    print(f"Mechanics unassigned from ticket {ticket_id}: {mechanic_ids}")
+    assigned = sorted(
+        mech_id for (mech_id,) in db.session.query(Ticket_Mechanics.mechanic_id)
+        .filter(Ticket_Mechanics.service_ticket_id == ticket_id, Ticket_Mechanics.mechanic_id.in_(mechanic_ids)))
+    if assigned:
+        db.session.execute(
+            delete(Ticket_Mechanics)
+            .where(Ticket_Mechanics.service_ticket_id == ticket_id, Ticket_Mechanics.mechanic_id.in_(assigned)))
     db.session.commit()
-    return ticket_mechanic_schema.jsonify(ticket), 200
+    return jsonify({
+        "service_ticket_id": ticket_id,
+        "unassigned": assigned,
+        "not_assigned": sorted(set(mechanic_ids).difference(assigned))
+    }), 200
 
 
 # ==========================================================================
@@ -137,12 +184,26 @@ def unassign_mechanics(user_id, role, ticket_id):
 @ticket_mechanics_bp.route('/<int:mechanic_id>/get_mechanic', methods=['GET'])
 @token_required
 @role_required(['admin'])
-@cache.cached(timeout=30)
+@cached_view(Service_Ticket.__tablename__, Ticket_Mechanics.__tablename__, Mechanics.__tablename__)
 def get_mechanics(mechanic_id, user_id, role):
-    tickets = (
-    db.session.query(Service_Ticket).join(Ticket_Mechanics).filter(Ticket_Mechanics.mechanic_id == mechanic_id)
-    .all())
-    if not tickets:
+    # One query for the page of tickets plus one batched SELECT ... IN for their
+    # co-assigned mechanics, however many tickets the mechanic has.
+    query = (
+        db.session.query(Service_Ticket)
+        .join(Ticket_Mechanics, Ticket_Mechanics.service_ticket_id == Service_Ticket.id)
+        .filter(Ticket_Mechanics.mechanic_id == mechanic_id)
+        .options(
+            load_only(Service_Ticket.id, Service_Ticket.service_description, Service_Ticket.price,
+                      Service_Ticket.vin, Service_Ticket.service_date),
+            selectinload(Service_Ticket.mechanics).load_only(
+                Mechanics.id, Mechanics.first_name, Mechanics.last_name, Mechanics.email)))
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        tickets, next_cursor = keyset_by_date(query, Service_Ticket.service_date, Service_Ticket.id,
+                                              limit, request.args.get('after'))
+    except ValueError:
+        return jsonify({"message": "Invalid limit or cursor"}), 400
+    if not tickets and not request.args.get('after'):
         return jsonify({"message": "Ticket not found"}), 404
 
     tickets_list = [
@@ -164,16 +225,15 @@ def get_mechanics(mechanic_id, user_id, role):
         }
         for ticket in tickets
     ]
-    print(tickets_list) 
     
-    return jsonify(tickets_list), 200
+    return jsonify({"tickets": tickets_list, "next_cursor": next_cursor}), 200
 
 # ==========================================================================
 
 @ticket_mechanics_bp.route('/get_ticket_customer', methods=['GET'])
 @token_required
 @role_required(['admin'])
-@cache.cached(timeout=30)
+@cached_per_user(timeout=300, tables=(Customers.__tablename__, Service_Ticket.__tablename__))
 def get_ticket_customers(user_id, role):
     
     customer = db.session.get(Customers, user_id)
@@ -206,27 +266,22 @@ def get_ticket_customers(user_id, role):
 #=========================================================================
 @ticket_mechanics_bp.route('/get_most_ticket_mechanic', methods=['GET'])
 @limiter.limit("50 per hour", override_defaults=True)
-@cache.cached(timeout=20) 
 @token_required
 @role_required(['admin'])  
+@cached_view(Ticket_Mechanics.__tablename__, Mechanics.__tablename__, Service_Ticket.__tablename__)
 def get_most_ticket_mechanics(user_id, role):
     if role != 'admin':
         return jsonify({"message": "Unauthorized"}), 403
 
-    top_mechanics = (
-        db.session.query(
-            Mechanics.id,
-            Mechanics.first_name,
-            Mechanics.last_name,
-            Mechanics.email,
-            func.count(Service_Ticket.id).label('ticket_count')
-        )
-        .join(Service_Ticket.mechanics)  
-        .group_by(Mechanics.id)
-        .order_by(func.count(Service_Ticket.id).desc())
-        .limit(3)
-        .all()
-    )
+    try:
+        limit = parse_limit(request.args.get('limit'), default=LEADERBOARD_DEFAULT_LIMIT, maximum=LEADERBOARD_MAX_LIMIT)
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"message": "limit must be a positive integer and from/to dates in YYYY-MM-DD format"}), 400
+
+    # Sums the trigger-maintained mechanic_ticket_daily buckets instead of joining every assignment
+    top_mechanics = mechanic_leaderboard(db.session, limit, date_from, date_to)
 
     # Prepare response
     mechanics_list = [
@@ -1,5 +1,6 @@
 from app.extenstions import ma
 from app.models import Ticket_Mechanics 
+from app.util.serializers import row_serializer
 
 class  Ticket_Mechanics_Schema(ma.SQLAlchemyAutoSchema):
    
@@ -8,4 +9,5 @@ class  Ticket_Mechanics_Schema(ma.SQLAlchemyAutoSchema):
         include_fk = True
         
 ticket_mechanic_schema = Ticket_Mechanics_Schema()
-ticket_mechanics_schema = Ticket_Mechanics_Schema(many=True)
\ No newline at end of file
+ticket_mechanics_schema = Ticket_Mechanics_Schema(many=True)
+ticket_mechanic_row = row_serializer(Ticket_Mechanics, mapping=True)
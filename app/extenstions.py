@@ -2,6 +2,12 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_marshmallow import Marshmallow
 from flask_caching import Cache
+from flask import request, make_response, Response
+from functools import wraps
+from sqlalchemy import event, inspect as sa_inspect
+import hashlib
+import time
+from app.util.compression import precompress
 
 
 
@@ -15,3 +21,205 @@ limiter = Limiter(
 
 cache = Cache()
 
+#  =========================================================================
+#  Per-table version counters. Write routes bump the counter of every table they
+#  change; cached list views (and, with a shared cache, their ETags) are keyed by
+#  the current versions.
+
+TABLE_VERSION_KEY = "table_version/%s"
+
+# List caches are invalidated by the session events below, so they can live much longer --
+# but only when every worker shares the cache. SimpleCache and the version counters in it
+# are private to one process: a write served by one worker is never seen by the others.
+# There list entries keep the short TTL and versioned_etag hashes the cached body instead
+# of the versions, so both bodies and 304s are at most LOCAL_LIST_CACHE_TIMEOUT stale.
+LIST_CACHE_TIMEOUT = 60 * 60
+# Bounds staleness across SimpleCache workers for cached bodies and, through the body
+# hash, for ETags. Version keys stay forever but only ever feed local cache keys.
+LOCAL_LIST_CACHE_TIMEOUT = 30
+SHARED_CACHE_TYPES = frozenset(('FileSystemCache', 'RedisCache', 'RedisSentinelCache', 'RedisClusterCache',
+                                'MemcachedCache', 'SASLMemcachedCache'))
+
+
+def list_cache_timeout(cache_type):
+    # Default TTL for cached_view given the configured CACHE_TYPE
+    if cache_type in SHARED_CACHE_TYPES:
+        return LIST_CACHE_TIMEOUT
+    return LOCAL_LIST_CACHE_TIMEOUT
+
+
+def table_version(table):
+    key = TABLE_VERSION_KEY % table
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so tags handed out before a cache restart are never reused
+        cache.add(key, time.time_ns(), timeout=0)
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(*tables):
+    for table in tables:
+        table_version(table)
+        cache.cache.inc(TABLE_VERSION_KEY % table)
+
+
+def _versioned_key(tables):
+    args = str(tuple(sorted(request.args.items(multi=True))))
+    versions = ",".join(f"{table}:{table_version(table)}" for table in tables)
+    return f"view/{request.path}?{hashlib.md5(args.encode()).hexdigest()}#{versions}"
+
+
+def versioned_cache_key(*tables):
+    # make_cache_key for cache.cached: a write to any table starts a fresh cache entry
+    def make_cache_key(*args, **kwargs):
+        return _versioned_key(tables)
+    return make_cache_key
+
+
+def cached_view(*tables, timeout=None):
+    # cache.cached under a versioned key, storing the response gzip-compressed. Without
+    # an explicit timeout entries use CACHE_DEFAULT_TIMEOUT (see list_cache_timeout).
+    def decorator(f):
+        return cache.cached(timeout=timeout, make_cache_key=versioned_cache_key(*tables))(precompress(f))
+    return decorator
+
+
+def shared_cache():
+    # True when the current app's cache backend is visible to every worker process
+    return type(cache.cache).__name__ in SHARED_CACHE_TYPES
+
+
+def versioned_etag(*tables):
+    # Answer 304 Not Modified when the client's ETag is still current. Place it after the
+    # auth decorators and before cache.cached. With a shared cache the tag comes from the
+    # table versions and a match skips the view entirely. A per-process cache would keep
+    # a private version counter that writes on other workers never bump, so there the
+    # tag is a hash of the (cached) body and goes stale only as long as the body does.
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            etag = None
+            if shared_cache():
+                etag = hashlib.md5(_versioned_key(tables).encode()).hexdigest()
+                if request.if_none_match.contains_weak(etag):
+                    return _not_modified(etag)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if etag is None:
+                etag = hashlib.md5(response.get_data()).hexdigest()
+                if request.if_none_match.contains_weak(etag):
+                    return _not_modified(etag)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated
+    return decorator
+
+
+def _not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _missing_identity(f, *args, **kwargs):
+    return 'user_id' not in kwargs or 'role' not in kwargs
+
+
+def cached_per_user(timeout=None, tables=()):
+    # cache.cached keyed by path, query string and the caller's user_id/role, so per-user
+    # views can use long TTLs without leaking between users. Place it below
+    # token_required; without an identity the cache is bypassed. Optional `tables`
+    # fold their version counters into the key so writes take effect immediately.
+    def make_cache_key(*args, **kwargs):
+        return f"user/{kwargs['role']}:{kwargs['user_id']}/" + _versioned_key(tables)
+    def decorator(f):
+        return cache.cached(timeout=timeout, make_cache_key=make_cache_key, unless=_missing_identity)(precompress(f))
+    return decorator
+
+
+#  =========================================================================
+#  Event-driven invalidation. Every flush or DML statement records the tables it
+#  touches against the innermost open transaction. A released savepoint hands its
+#  tables to the enclosing transaction and a rolled back one drops only its own;
+#  once the root transaction commits the versions are bumped, which retires every
+#  cache entry and ETag built from the old versions.
+
+def _transaction_tables(session):
+    # Tables changed per open root/savepoint transaction. The None entry holds DML
+    # executed before the session autobegins; the new root transaction adopts it.
+    return session.info.setdefault('changed_tables', {})
+
+
+def _changed_tables(session):
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    return _transaction_tables(session).setdefault(transaction, set())
+
+
+def _enclosing_transaction(transaction):
+    # Flushes run in plain subtransactions; tables belong to the savepoint or root above
+    parent = transaction.parent
+    while parent.parent is not None and not parent.nested:
+        parent = parent.parent
+    return parent
+
+
+def _collect_flushed_tables(session, flush_context):
+    changed = _changed_tables(session)
+    for objects, is_deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        for obj in objects:
+            state = sa_inspect(obj)
+            changed.add(state.mapper.local_table.name)
+            # Rows in association tables are written through `secondary` relationships
+            for rel in state.mapper.relationships:
+                if rel.secondary is None:
+                    continue
+                if is_deleted or state.attrs[rel.key].history.has_changes():
+                    changed.add(rel.secondary.name)
+
+
+def _collect_executed_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+
+def _adopt_pending_tables(session, transaction):
+    if transaction.parent is None:
+        tables = _transaction_tables(session)
+        if None in tables:
+            tables[transaction] = tables.pop(None)
+
+
+def _mark_committed(session):
+    # after_commit fires for released savepoints too; remember which transaction it was
+    session.info['committed_transaction'] = session.get_nested_transaction() or session.get_transaction()
+
+
+def _settle_changed_tables(session, transaction):
+    committed = session.info.get('committed_transaction') is transaction
+    if committed:
+        del session.info['committed_transaction']
+    changed = _transaction_tables(session).pop(transaction, None)
+    if not changed or not committed:
+        return
+    if transaction.parent is None:
+        bump_table_version(*changed)
+    else:
+        _transaction_tables(session).setdefault(_enclosing_transaction(transaction), set()).update(changed)
+
+
+def init_cache_invalidation(session):
+    listeners = (
+        ('after_flush', _collect_flushed_tables),
+        ('do_orm_execute', _collect_executed_tables),
+        ('after_transaction_create', _adopt_pending_tables),
+        ('after_commit', _mark_committed),
+        ('after_transaction_end', _settle_changed_tables),
+    )
+    for name, fn in listeners:
+        if not event.contains(session, name, fn):
+            event.listen(session, name, fn)
@@ -1,7 +1,7 @@
 import datetime
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, String, Table, Boolean
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, String, Table, Boolean, DDL, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship, DeclarativeBase
 from datetime import date, datetime
 
@@ -45,11 +45,12 @@ class Service_Ticket(Base):
     __tablename__ = 'service_tickets'
     
     id: Mapped[int] = mapped_column(primary_key=True)
-    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey('customers.id'), nullable=True) #made true for testing
-    service_description: Mapped[str] = mapped_column(String(500), nullable=False)
+    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey('customers.id'), nullable=True, index=True) #made true for testing
+    # active_history: the popularity summaries need the old value when these change
+    service_description: Mapped[str] = mapped_column(String(500), nullable=False, active_history=True)
     price: Mapped[float] = mapped_column(Float, nullable=False)
-    vin: Mapped[str] = mapped_column(String(20), nullable=False)
-    service_date: Mapped[Date] = mapped_column(Date, default=lambda: date.today(), nullable=False)
+    vin: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    service_date: Mapped[Date] = mapped_column(Date, default=lambda: date.today(), nullable=False, active_history=True, index=True)
 
     
     mechanics: Mapped[list['Mechanics']] = relationship('Mechanics', secondary='ticket_mechanics', back_populates='service_tickets')
@@ -57,6 +58,23 @@ class Service_Ticket(Base):
         'Customers', back_populates='service_tickets')
     invoices: Mapped[list['Invoice']] = relationship('Invoice', back_populates='service_ticket')
     
+ #  =========================================================================
+ # Summary tables for GET /service_tickets/popular, maintained on every ticket
+ # write by app/util/summaries.py inside the same transaction.
+class Service_Popularity(Base):
+    __tablename__ = 'service_popularity'
+
+    service_description: Mapped[str] = mapped_column(String(500), primary_key=True)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)
+
+
+class Service_Popularity_Daily(Base):
+    __tablename__ = 'service_popularity_daily'
+
+    service_description: Mapped[str] = mapped_column(String(500), primary_key=True)
+    service_date: Mapped[Date] = mapped_column(Date, primary_key=True, index=True)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
     
  #  =========================================================================    
 class Ticket_Mechanics(Base):
@@ -64,7 +82,8 @@ class Ticket_Mechanics(Base):
     
     service_ticket_id: Mapped[int] = mapped_column(Integer, ForeignKey('service_tickets.id'), primary_key=True)
     
-    mechanic_id: Mapped[int] = mapped_column(Integer, ForeignKey('mechanics.id'), primary_key=True)
+    # The primary key leads with service_ticket_id; lookups by mechanic need their own index
+    mechanic_id: Mapped[int] = mapped_column(Integer, ForeignKey('mechanics.id'), primary_key=True, index=True)
 
     
  #  =========================================================================
@@ -88,6 +107,89 @@ class Mechanics(Base):
         back_populates='mechanics'
     )
 
+#  =========================================================================
+# Daily per-mechanic assignment counts for the leaderboard, keyed by the ticket's
+# service_date. Kept in sync by database triggers on ticket_mechanics (below), so every
+# write path -- ORM, secondary collections or bulk SQL -- updates the buckets.
+class Mechanic_Ticket_Daily(Base):
+    __tablename__ = 'mechanic_ticket_daily'
+
+    mechanic_id: Mapped[int] = mapped_column(Integer, ForeignKey('mechanics.id'), primary_key=True)
+    service_date: Mapped[Date] = mapped_column(Date, primary_key=True, index=True)
+    ticket_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+MECHANIC_TICKET_DAILY_SQLITE = [
+    """CREATE TRIGGER IF NOT EXISTS mechanic_ticket_daily_ai AFTER INSERT ON ticket_mechanics BEGIN
+        INSERT INTO mechanic_ticket_daily (mechanic_id, service_date, ticket_count)
+        SELECT new.mechanic_id, service_date, 1 FROM service_tickets WHERE id = new.service_ticket_id
+        ON CONFLICT (mechanic_id, service_date) DO UPDATE SET ticket_count = ticket_count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mechanic_ticket_daily_ad AFTER DELETE ON ticket_mechanics BEGIN
+        UPDATE mechanic_ticket_daily SET ticket_count = ticket_count - 1
+        WHERE mechanic_id = old.mechanic_id
+          AND service_date = (SELECT service_date FROM service_tickets WHERE id = old.service_ticket_id);
+        DELETE FROM mechanic_ticket_daily WHERE mechanic_id = old.mechanic_id AND ticket_count <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mechanic_ticket_daily_au AFTER UPDATE ON ticket_mechanics BEGIN
+        UPDATE mechanic_ticket_daily SET ticket_count = ticket_count - 1
+        WHERE mechanic_id = old.mechanic_id
+          AND service_date = (SELECT service_date FROM service_tickets WHERE id = old.service_ticket_id);
+        INSERT INTO mechanic_ticket_daily (mechanic_id, service_date, ticket_count)
+        SELECT new.mechanic_id, service_date, 1 FROM service_tickets WHERE id = new.service_ticket_id
+        ON CONFLICT (mechanic_id, service_date) DO UPDATE SET ticket_count = ticket_count + 1;
+        DELETE FROM mechanic_ticket_daily WHERE mechanic_id = old.mechanic_id AND ticket_count <= 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS mechanic_ticket_daily_ticket_date AFTER UPDATE OF service_date ON service_tickets
+    WHEN old.service_date <> new.service_date BEGIN
+        UPDATE mechanic_ticket_daily SET ticket_count = ticket_count - 1
+        WHERE service_date = old.service_date
+          AND mechanic_id IN (SELECT mechanic_id FROM ticket_mechanics WHERE service_ticket_id = new.id);
+        INSERT INTO mechanic_ticket_daily (mechanic_id, service_date, ticket_count)
+        SELECT mechanic_id, new.service_date, 1 FROM ticket_mechanics WHERE service_ticket_id = new.id
+        ON CONFLICT (mechanic_id, service_date) DO UPDATE SET ticket_count = ticket_count + 1;
+        DELETE FROM mechanic_ticket_daily WHERE service_date = old.service_date AND ticket_count <= 0;
+    END""",
+]
+
+MECHANIC_TICKET_DAILY_POSTGRES = [
+    """CREATE OR REPLACE FUNCTION mechanic_ticket_daily_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE mechanic_ticket_daily d SET ticket_count = d.ticket_count - 1
+            FROM service_tickets t
+            WHERE t.id = OLD.service_ticket_id AND d.mechanic_id = OLD.mechanic_id AND d.service_date = t.service_date;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO mechanic_ticket_daily (mechanic_id, service_date, ticket_count)
+            SELECT NEW.mechanic_id, t.service_date, 1 FROM service_tickets t WHERE t.id = NEW.service_ticket_id
+            ON CONFLICT (mechanic_id, service_date) DO UPDATE SET ticket_count = mechanic_ticket_daily.ticket_count + 1;
+        END IF;
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            DELETE FROM mechanic_ticket_daily WHERE mechanic_id = OLD.mechanic_id AND ticket_count <= 0;
+        END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION mechanic_ticket_daily_ticket_date() RETURNS trigger AS $$
+    BEGIN
+        UPDATE mechanic_ticket_daily d SET ticket_count = d.ticket_count - 1
+        FROM ticket_mechanics tm
+        WHERE tm.service_ticket_id = NEW.id AND d.mechanic_id = tm.mechanic_id AND d.service_date = OLD.service_date;
+        INSERT INTO mechanic_ticket_daily (mechanic_id, service_date, ticket_count)
+        SELECT tm.mechanic_id, NEW.service_date, 1 FROM ticket_mechanics tm WHERE tm.service_ticket_id = NEW.id
+        ON CONFLICT (mechanic_id, service_date) DO UPDATE SET ticket_count = mechanic_ticket_daily.ticket_count + 1;
+        DELETE FROM mechanic_ticket_daily WHERE service_date = OLD.service_date AND ticket_count <= 0;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS mechanic_ticket_daily_sync ON ticket_mechanics",
+    """CREATE TRIGGER mechanic_ticket_daily_sync AFTER INSERT OR UPDATE OR DELETE ON ticket_mechanics
+        FOR EACH ROW EXECUTE FUNCTION mechanic_ticket_daily_sync()""",
+    "DROP TRIGGER IF EXISTS mechanic_ticket_daily_ticket_date ON service_tickets",
+    """CREATE TRIGGER mechanic_ticket_daily_ticket_date AFTER UPDATE OF service_date ON service_tickets
+        FOR EACH ROW WHEN (OLD.service_date IS DISTINCT FROM NEW.service_date)
+        EXECUTE FUNCTION mechanic_ticket_daily_ticket_date()""",
+]
+
 #  =========================================================================
 class ItemsDescription(Base):
     __tablename__ = 'items_description'
@@ -99,6 +201,43 @@ class ItemsDescription(Base):
     
 
     inventory_items: Mapped[list['InventoryItem']] = relationship('InventoryItem', back_populates='items_description')
+
+
+# Full-text index over part names and descriptions (see app/util/search.py).
+# SQLite: external-content FTS5 table kept in sync by triggers on every write.
+# Postgres: GIN expression index over the same tsvector the search query uses.
+ITEMS_DESCRIPTION_FTS = 'items_description_fts'
+
+ITEMS_DESCRIPTION_FTS_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {ITEMS_DESCRIPTION_FTS} USING fts5(
+        part_name, part_description, content='items_description', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_description_fts_ai AFTER INSERT ON items_description BEGIN
+        INSERT INTO {ITEMS_DESCRIPTION_FTS}(rowid, part_name, part_description)
+        VALUES (new.id, new.part_name, new.part_description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_description_fts_ad AFTER DELETE ON items_description BEGIN
+        INSERT INTO {ITEMS_DESCRIPTION_FTS}({ITEMS_DESCRIPTION_FTS}, rowid, part_name, part_description)
+        VALUES ('delete', old.id, old.part_name, old.part_description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS items_description_fts_au AFTER UPDATE ON items_description BEGIN
+        INSERT INTO {ITEMS_DESCRIPTION_FTS}({ITEMS_DESCRIPTION_FTS}, rowid, part_name, part_description)
+        VALUES ('delete', old.id, old.part_name, old.part_description);
+        INSERT INTO {ITEMS_DESCRIPTION_FTS}(rowid, part_name, part_description)
+        VALUES (new.id, new.part_name, new.part_description);
+    END""",
+]
+
+ITEMS_DESCRIPTION_FTS_POSTGRES = [
+    """CREATE INDEX IF NOT EXISTS ix_items_description_search ON items_description
+        USING gin (to_tsvector('simple', part_name || ' ' || part_description))""",
+]
+
+for _stmt in ITEMS_DESCRIPTION_FTS_SQLITE:
+    event.listen(ItemsDescription.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+for _stmt in ITEMS_DESCRIPTION_FTS_POSTGRES:
+    event.listen(ItemsDescription.__table__, 'after_create', DDL(_stmt).execute_if(dialect='postgresql'))
+event.listen(ItemsDescription.__table__, 'before_drop',
+             DDL(f"DROP TABLE IF EXISTS {ITEMS_DESCRIPTION_FTS}").execute_if(dialect='sqlite'))
    
 #  =========================================================================
 class InventoryItem(Base):
@@ -107,7 +246,7 @@ class InventoryItem(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
     items_description_id: Mapped[int] = mapped_column(
-    Integer, ForeignKey('items_description.id'), nullable=False)
+    Integer, ForeignKey('items_description.id'), nullable=False, index=True)
 
     items_description: Mapped['ItemsDescription'] = relationship('ItemsDescription', back_populates='inventory_items')
 
@@ -147,8 +286,8 @@ class Invoice(Base):
     __tablename__ = 'invoices'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey('customers.id'), nullable=True) #made true for testing
-    service_ticket_id: Mapped[int] = mapped_column(Integer, ForeignKey('service_tickets.id'), nullable=False)
+    customer_id: Mapped[int] = mapped_column(Integer, ForeignKey('customers.id'), nullable=True, index=True) #made true for testing
+    service_ticket_id: Mapped[int] = mapped_column(Integer, ForeignKey('service_tickets.id'), nullable=False, index=True)
     price: Mapped[float] = mapped_column(Float, nullable=False)
     
     invoice_date: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=True)
@@ -162,3 +301,9 @@ class Invoice(Base):
 
     inventory_items: Mapped[list["InventoryItem"]] = relationship("InventoryItem",secondary="invoice_inventory_link",back_populates="invoices",foreign_keys="[Invoice_Inventory_Link.invoice_id, Invoice_Inventory_Link.inventory_item_id]", overlaps="invoice, invoice_inventory_links, inventory_item")
 
+
+# The bucket triggers span several tables, so they are created once all tables exist
+for _stmt in MECHANIC_TICKET_DAILY_SQLITE:
+    event.listen(Base.metadata, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+for _stmt in MECHANIC_TICKET_DAILY_POSTGRES:
+    event.listen(Base.metadata, 'after_create', DDL(_stmt).execute_if(dialect='postgresql'))
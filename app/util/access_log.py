@@ -0,0 +1,136 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import request, g
+from app.util.auth import request_claims
+
+ACCESS_LOGGER = 'mech_shop.access'
+QUEUE_SIZE = 10000
+MAX_BODY_CHARS = 2000
+REDACTED_HEADERS = frozenset(('authorization', 'cookie'))
+REDACTED_FIELDS = frozenset(('password',))
+
+#  =========================================================================
+#  One structured record per request. The request thread only builds a small dict
+#  and enqueues it; JSON formatting and I/O happen on the QueueListener thread.
+
+
+class _RecordQueueHandler(QueueHandler):
+    # The stock handler formats the message before enqueueing, on the request thread.
+    # Access records carry a plain dict, so they can cross the queue as they are.
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging: shed records when the writer falls behind
+            _RecordQueueHandler.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = getattr(record, 'access', None)
+        if entry is None:
+            entry = {"message": record.getMessage()}
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+_queue = queue.Queue(QUEUE_SIZE)
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = QueueListener(_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger = logging.getLogger(ACCESS_LOGGER)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(_RecordQueueHandler(_queue))
+
+
+def flush_access_log():
+    # Block until the listener has written everything queued so far
+    _queue.join()
+
+
+def _redacted_headers():
+    return {k: ('***' if k.lower() in REDACTED_HEADERS else v) for k, v in request.headers.items()}
+
+
+def _mask(value):
+    # Same masking the login routes use: password values become '***' at any depth
+    if isinstance(value, dict):
+        return {k: ('***' if k in REDACTED_FIELDS else _mask(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_mask(v) for v in value]
+    return value
+
+
+def _redacted_body():
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        body = json.dumps(_mask(payload), default=str)
+    elif request.form:
+        body = json.dumps(_mask(request.form.to_dict()))
+    elif request.mimetype in ('application/json', 'application/x-www-form-urlencoded', 'multipart/form-data'):
+        # Unparseable credentials-bearing body: do not risk logging it verbatim
+        body = '<unparsed body omitted>'
+    else:
+        body = request.get_data(as_text=True)
+    return body[:MAX_BODY_CHARS]
+
+
+def init_access_log(app):
+    # ACCESS_LOG_SAMPLE_RATE: fraction of requests logged (5xx responses always are).
+    # ACCESS_LOG_DEBUG: also dump request headers (credentials redacted) and bodies.
+    _start_listener()
+    logger = logging.getLogger(ACCESS_LOGGER)
+
+    @app.before_request
+    def start_access_record():
+        g.access_started = time.perf_counter()
+
+    @app.after_request
+    def write_access_record(response):
+        started = g.pop('access_started', None)
+        if started is None:
+            return response
+        rate = app.config.get('ACCESS_LOG_SAMPLE_RATE', 1.0)
+        if response.status_code < 500 and (rate <= 0 or (rate < 1 and random.random() >= rate)):
+            return response
+
+        claims = request_claims() or {}
+        entry = {
+            "ts": time.time(),
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else None,
+            "path": request.path,
+            "status": response.status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "user_id": claims.get("sub"),
+            "role": claims.get("role"),
+            "remote_addr": request.remote_addr,
+        }
+        if app.config.get('ACCESS_LOG_DEBUG'):
+            entry["headers"] = _redacted_headers()
+            if request.method in ('POST', 'PUT', 'PATCH', 'DELETE'):
+                entry["body"] = _redacted_body()
+        logger.info("access", extra={"access": entry})
+        return response
@@ -3,10 +3,97 @@ from datetime import datetime, timedelta, timezone
 from functools import wraps
 from flask import request, jsonify
 from jose import exceptions as jose_exceptions
+from collections import OrderedDict
+import threading
+import time
 import os
 
 SECRET_KEY = os.environ.get("SECRET_KEY") or "super secret key"
 
+TOKEN_CACHE_SIZE = 1024
+
+
+class VerifiedTokenCache:
+    # Bounded LRU of token -> claims for tokens whose signature already checked out.
+    # Entries are dropped once the token's exp passes, so expiry is still enforced.
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token, claims):
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+def _request_token():
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        token = auth_header.split(' ', 1)[1].strip()
+        if token:
+            return token
+    return request.cookies.get('token') or request.args.get('token')
+
+
+JWT_RESULT_KEY = 'mech_shop.jwt_result'
+
+
+def _decode_request_token():
+    # Returns (claims, error_response). The outcome is kept in the request's WSGI environ,
+    # so stacked decorators share a single decode per request. (Not flask.g: that lives
+    # on the app context, which Flask reuses across requests when one is already pushed.)
+    if JWT_RESULT_KEY in request.environ:
+        return request.environ[JWT_RESULT_KEY]
+    token = _request_token()
+    if not token:
+        result = (None, ({'message': 'Token is missing!'}, 401))
+    else:
+        claims = token_cache.get(token)
+        if claims is not None:
+            result = (claims, None)
+        else:
+            try:
+                claims = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+                token_cache.put(token, claims)
+                result = (claims, None)
+            except jose_exceptions.ExpiredSignatureError:
+                result = (None, ({"message": "Token is expired!"}, 401))
+            except jose_exceptions.JWTError:
+                result = (None, ({"message": "Token is invalid!"}, 401))
+    request.environ[JWT_RESULT_KEY] = result
+    return result
+
+
+def request_claims():
+    # Claims already verified for the current request, or None; never decodes by itself
+    return (request.environ.get(JWT_RESULT_KEY) or (None, None))[0]
+
 
 def create_admin_token(user_id):
     return encode_token(user_id, role='admin')
@@ -25,24 +112,11 @@ def role_required(required_roles):
             # role may be injected by token_required into kwargs, but don't rely on decorator order.
             role = kwargs.get('role')
             if not role:
-                # attempt to extract token from same locations as token_required
-                token = None
-                auth_header = request.headers.get('Authorization')
-                if auth_header and auth_header.startswith('Bearer '):
-                    token = auth_header.split(' ', 1)[1].strip()
-                if not token:
-                    token = request.cookies.get('token')
-                if not token:
-                    token = request.args.get('token')
-                if not token:
-                    return jsonify({'message': 'Token is missing!'}), 401
-                try:
-                    data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-                    role = data.get("role", "mechanic")
-                except jose_exceptions.ExpiredSignatureError:
-                    return jsonify({"message": "Token is expired!"}), 401
-                except jose_exceptions.JWTError:
-                    return jsonify({"message": "Token is invalid!"}), 401
+                claims, error = _decode_request_token()
+                if error:
+                    body, status = error
+                    return jsonify(body), status
+                role = claims.get("role", "mechanic")
 
             if role not in required_roles:
                 return jsonify({'message': 'You do not have permission to access this resource.'}), 403
@@ -64,26 +138,12 @@ def encode_token(user_id, role='mechanic'):
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ', 1)[1].strip()
-        if not token:
-            token = request.cookies.get('token')
-        if not token:
-            token = request.args.get('token')
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401 
-        try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            user_id = data.get("sub")
-            role = data.get("role", "mechanic")
-        except jose_exceptions.ExpiredSignatureError:
-            return jsonify({"message": "Token is expired!"}), 401
-        except jose_exceptions.JWTError as e:
-            return jsonify({"message": "Token is invalid!"}), 401
+        claims, error = _decode_request_token()
+        if error:
+            body, status = error
+            return jsonify(body), status
         kwargs = dict(kwargs)
-        kwargs['user_id'] = user_id
-        kwargs['role'] = role
+        kwargs['user_id'] = claims.get("sub")
+        kwargs['role'] = claims.get("role", "mechanic")
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def read_records(text, content_type):
+    # Yield (row_number, record, error) for every CSV row or NDJSON line. A row that cannot
+    # be parsed comes back with an error instead of aborting the whole file.
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype in NDJSON_TYPES:
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, None, "invalid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "expected a JSON object"
+                continue
+            yield number, record, None
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        for number, row in enumerate(reader, start=1):
+            if None in row:
+                yield number, None, "too many columns"
+                continue
+            # Empty CSV cells mean "not provided", not empty strings
+            yield number, {k: v for k, v in row.items() if v not in ('', None)}, None
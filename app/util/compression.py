@@ -0,0 +1,91 @@
+import gzip
+import zlib
+from functools import wraps
+from flask import request, current_app, make_response
+
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+DEFAULT_COMPRESS_LEVEL = 6
+COMPRESSIBLE_MIMETYPES = frozenset(('application/json', 'application/x-ndjson', 'text/html',
+                                    'text/plain', 'text/css', 'text/csv', 'application/javascript'))
+CODINGS = ('gzip', 'deflate')
+
+#  =========================================================================
+#  Negotiated gzip/deflate for response bodies. Cached views store their body
+#  gzip-compressed (precompress below), so a cache hit is sent as-is to the clients
+#  that accept gzip and only decoded for the rare one that does not.
+
+
+def _encode(data, coding, level):
+    if coding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zlib.compress(data, level)
+
+
+def _decode(data, coding):
+    if coding == 'gzip':
+        return gzip.decompress(data)
+    return zlib.decompress(data)
+
+
+def _compressible(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    min_size = current_app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE)
+    return len(response.get_data()) >= min_size
+
+
+def _weaken_etag(response):
+    # The bytes differ per coding; a weak validator still matches If-None-Match
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _apply(response, coding):
+    level = current_app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL)
+    response.set_data(_encode(response.get_data(), coding, level))
+    response.headers['Content-Encoding'] = coding
+    _weaken_etag(response)
+
+
+def precompress(f):
+    # Place directly under cache.cached: the cache then stores the gzip body
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if 'Content-Encoding' not in response.headers and _compressible(response):
+            _apply(response, 'gzip')
+        return response
+    return decorated
+
+
+def compress_response(response):
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200:
+        return response
+    accepted = request.accept_encodings
+    coding = response.headers.get('Content-Encoding')
+    if coding:
+        if coding not in CODINGS:
+            return response
+        response.vary.add('Accept-Encoding')
+        if accepted[coding]:
+            _weaken_etag(response)
+            return response
+        # Pre-compressed body for a client that does not take this coding
+        response.set_data(_decode(response.get_data(), coding))
+        del response.headers['Content-Encoding']
+
+    if not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    best = accepted.best_match(CODINGS)
+    if best:
+        _apply(response, best)
+    return response
+
+
+def init_compression(app):
+    # COMPRESS_MIN_SIZE: smallest body (bytes) worth compressing. COMPRESS_LEVEL: 1-9.
+    app.after_request(compress_response)
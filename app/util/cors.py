@@ -0,0 +1,63 @@
+from flask import request, Response
+
+DEFAULT_CORS_ORIGINS = ["http://localhost:5173"]
+DEFAULT_CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+DEFAULT_CORS_HEADERS = ["Content-Type", "Authorization", "X-Requested-With"]
+DEFAULT_CORS_MAX_AGE = 600
+EXPOSE_HEADERS = "Content-Range, X-Content-Range"
+
+#  =========================================================================
+#  CORS headers are built once per allowed origin when the app is created; each
+#  request is a set lookup on its Origin and a dict update on the response.
+
+
+def init_cors(app):
+    origins = app.config.get('CORS_ORIGINS', DEFAULT_CORS_ORIGINS)
+    if isinstance(origins, str):
+        origins = [origins]
+    credentials = app.config.get('CORS_SUPPORTS_CREDENTIALS', True)
+    methods = ','.join(app.config.get('CORS_METHODS', DEFAULT_CORS_METHODS))
+    allow_headers = ','.join(app.config.get('CORS_HEADERS', DEFAULT_CORS_HEADERS))
+    max_age = str(app.config.get('CORS_MAX_AGE', DEFAULT_CORS_MAX_AGE))
+
+    def header_sets(origin, with_credentials):
+        response = {'Access-Control-Allow-Origin': origin, 'Access-Control-Expose-Headers': EXPOSE_HEADERS}
+        if with_credentials:
+            response['Access-Control-Allow-Credentials'] = 'true'
+        preflight = dict(response, **{
+            'Access-Control-Allow-Methods': methods,
+            'Access-Control-Allow-Headers': allow_headers,
+            # Lets browsers reuse the preflight instead of sending OPTIONS before every call
+            'Access-Control-Max-Age': max_age,
+            'X-Content-Type-Options': 'nosniff',
+        })
+        return response, preflight
+
+    allowed = frozenset(o for o in origins if o != '*')
+    per_origin = {origin: header_sets(origin, credentials) for origin in allowed}
+    # Browsers reject credentials together with a wildcard origin
+    wildcard = header_sets('*', False) if '*' in origins else None
+
+    def lookup():
+        origin = request.headers.get('Origin')
+        if origin is None:
+            return None
+        return per_origin.get(origin, wildcard)
+
+    @app.before_request
+    def handle_preflight():
+        if request.method == "OPTIONS":
+            res = Response(status=200)
+            headers = lookup()
+            if headers:
+                res.headers.update(headers[1])
+                res.vary.add('Origin')
+            return res
+
+    @app.after_request
+    def add_cors_headers(response):
+        headers = lookup()
+        if headers:
+            response.headers.update(headers[0])
+            response.vary.add('Origin')
+        return response
@@ -0,0 +1,45 @@
+from sqlalchemy import insert, update, and_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+
+def insert_ignore(session, table):
+    # INSERT that silently skips rows conflicting with a primary or unique key
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == 'mysql':
+        return mysql.insert(table).prefix_with('IGNORE')
+    return insert(table)
+
+
+def upsert_increment(session, table, index_elements, column, rows, connection=None):
+    # Add rows[column] onto the rows already stored under the same index_elements key and
+    # insert the others: INSERT ... ON CONFLICT DO UPDATE SET column = column + excluded.column.
+    # Rows must not repeat a key; aggregate them first. `connection` runs the statements on
+    # a specific connection (e.g. inside a flush) instead of through the session.
+    if not rows:
+        return
+    executor = session if connection is None else connection
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite if dialect == 'sqlite' else postgresql).insert(table)
+        executor.execute(stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: table.c[column] + stmt.excluded[column]}).values(rows))
+    elif dialect == 'mysql':
+        stmt = mysql.insert(table)
+        executor.execute(stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column]}).values(rows))
+    else:
+        _update_then_insert(executor, table, index_elements, column, rows)
+
+
+def _update_then_insert(executor, table, index_elements, column, rows):
+    # Portable fallback: UPDATE each key, INSERT the ones that matched no row. A row
+    # inserted concurrently between the two raises IntegrityError instead of merging.
+    for row in rows:
+        key = and_(*(table.c[name] == row[name] for name in index_elements))
+        stmt = update(table).where(key).values({column: table.c[column] + row[column]})
+        if executor.execute(stmt).rowcount == 0:
+            executor.execute(insert(table).values(row))
@@ -0,0 +1,31 @@
+from sqlalchemy import select
+
+
+def public_columns(model, exclude=('password',)):
+    # Column names a list endpoint may expose, in table order. Password hashes are never listed.
+    return tuple(c.key for c in model.__table__.columns if c.key not in exclude)
+
+
+def parse_fields(raw, allowed):
+    # Parse ?fields=a,b,c into a tuple ordered like `allowed`, so equal field sets
+    # share one compiled serializer regardless of the order the client sent them in.
+    if not raw:
+        return tuple(allowed)
+    requested = {f.strip() for f in raw.split(',') if f.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if not requested:
+        return tuple(allowed)
+    return tuple(f for f in allowed if f in requested)
+
+
+def read_rows(session, model, fields=None, where=(), order_by=None):
+    # Core SELECT of the requested table columns (all when fields is None). Rows come back
+    # as plain mappings: no ORM instances are built and nothing enters the identity map,
+    # so read-only list endpoints skip hydration and unit-of-work bookkeeping entirely.
+    table = model.__table__
+    columns = [table.c[f] for f in fields] if fields else list(table.c)
+    stmt = select(*columns).where(*where)
+    stmt = stmt.order_by(*(order_by if order_by is not None else table.primary_key.columns))
+    return session.execute(stmt).mappings().all()
@@ -0,0 +1,11 @@
+from app.models import Base
+
+
+def ensure_indexes(session):
+    # create_all skips tables that already exist, so databases created before an index
+    # was declared in app/models.py never got it. Create whatever is missing.
+    connection = session.connection()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    session.commit()
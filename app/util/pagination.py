@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import date
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    # Missing limit falls back to the default page size; anything above the maximum is clamped.
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(*values):
+    # Opaque, URL-safe token holding the sort key of the last row on a page.
+    raw = json.dumps(list(values), default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_by_date(query, date_column, id_column, limit, cursor):
+    # Page a query ordered by (date, id). Returns (rows, next_cursor); next_cursor is None
+    # on the last page. One extra row is fetched instead of running a COUNT(*).
+    query = query.order_by(date_column, id_column)
+    after = decode_cursor(cursor)
+    if after is not None:
+        try:
+            after_date, after_id = date.fromisoformat(after[0]), int(after[1])
+        except (TypeError, ValueError, IndexError):
+            raise ValueError("Invalid cursor")
+        query = query.filter(or_(date_column > after_date, and_(date_column == after_date, id_column > after_id)))
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key).isoformat(), getattr(last, id_column.key))
+    return rows, next_cursor
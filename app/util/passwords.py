@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from flask import current_app, jsonify
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = 'scrypt:32768:8:1'
+DEFAULT_HASH_WORKERS = 4
+DEFAULT_HASH_QUEUE_SIZE = 32
+DEFAULT_HASH_TIMEOUT = 5
+
+#  =========================================================================
+#  Request-path hashing. hashlib releases the GIL inside scrypt/pbkdf2, so a small
+#  thread pool runs hashes in parallel while the number of hashes queued or running
+#  at once stays bounded; past that, callers wait up to PASSWORD_HASH_TIMEOUT and
+#  then get a 503 instead of piling up request threads.
+
+
+class PasswordHashingBusy(ServiceUnavailable):
+    description = "Password hashing is saturated, please retry shortly"
+
+
+class HashPool:
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._queued = self._running = self._completed = self._rejected = 0
+        self._wait_total = self._wait_max = 0.0
+
+    def run(self, fn, *args, timeout=DEFAULT_HASH_TIMEOUT, **kwargs):
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingBusy()
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def task():
+            waited = time.perf_counter() - queued_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                self._slots.release()
+
+        return self._executor.submit(task).result()
+
+    def stats(self):
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(1000 * self._wait_total / started, 3) if started else 0.0,
+                "max_wait_ms": round(1000 * self._wait_max, 3),
+            }
+
+
+def _busy_response(e):
+    response = jsonify({"message": e.description})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def init_password_hashing(app):
+    app.extensions['password_hash_pool'] = HashPool(
+        app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_HASH_WORKERS),
+        app.config.get('PASSWORD_HASH_QUEUE_SIZE', DEFAULT_HASH_QUEUE_SIZE))
+    app.register_error_handler(PasswordHashingBusy, _busy_response)
+
+
+def _pool():
+    return current_app.extensions['password_hash_pool']
+
+
+def _hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+def _timeout():
+    return current_app.config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_HASH_TIMEOUT)
+
+
+def hash_pool_stats():
+    return _pool().stats()
+
+
+def hash_password(password):
+    return _pool().run(generate_password_hash, password, method=_hash_method(), timeout=_timeout())
+
+
+def verify_password(stored_hash, password):
+    return _pool().run(check_password_hash, stored_hash, password, timeout=_timeout())
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # Werkzeug fills in default parameters ("scrypt" -> "scrypt:32768:8:1"); resolve them once
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def needs_rehash(stored_hash):
+    # True when the stored hash was made with a different method or work factor
+    return stored_hash.split('$', 1)[0] != _method_prefix(_hash_method())
+
+
+def rehash_if_outdated(user, password):
+    # Call after a successful login: the plaintext is only available at that point
+    if needs_rehash(user.password):
+        user.password = hash_password(password)
+        return True
+    return False
+
+#  =========================================================================
+
+
+def hash_passwords(passwords, workers=None, method=None):
+    # Hash many passwords across a process pool for bulk imports. Small batches are
+    # hashed inline to skip the pool start-up.
+    passwords = list(passwords)
+    hasher = partial(generate_password_hash, method=method or _hash_method())
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(passwords) <= workers:
+        return [hasher(p) for p in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(hasher, passwords, chunksize=chunksize))
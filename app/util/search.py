@@ -0,0 +1,78 @@
+import re
+from sqlalchemy import text, func, select
+from app.models import (ItemsDescription, ITEMS_DESCRIPTION_FTS,
+                        ITEMS_DESCRIPTION_FTS_SQLITE, ITEMS_DESCRIPTION_FTS_POSTGRES)
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+_PG_VECTOR = "to_tsvector('simple', part_name || ' ' || part_description)"
+
+
+def _terms(raw):
+    return _TERM.findall(raw or '')
+
+
+def ensure_search_index(session):
+    # Databases created before the index existed never ran the after_create DDL:
+    # create it now and backfill the FTS table from the existing rows.
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        exists = session.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                 {"name": ITEMS_DESCRIPTION_FTS}).first()
+        for stmt in ITEMS_DESCRIPTION_FTS_SQLITE:
+            session.execute(text(stmt))
+        if not exists:
+            session.execute(text(f"INSERT INTO {ITEMS_DESCRIPTION_FTS}({ITEMS_DESCRIPTION_FTS}) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for stmt in ITEMS_DESCRIPTION_FTS_POSTGRES:
+            session.execute(text(stmt))
+    session.commit()
+
+
+def _sqlite_search(session, name_terms, desc_terms, limit):
+    # Every term is a quoted prefix query, so partial words match as the user types
+    clauses = []
+    for column, terms in (('part_name', name_terms), ('part_description', desc_terms)):
+        if terms:
+            clauses.append(f"{column} : (" + " ".join(f'"{t}"*' for t in terms) + ")")
+    stmt = text(
+        f"SELECT d.id, d.part_name, d.part_description "
+        f"FROM {ITEMS_DESCRIPTION_FTS} JOIN items_description d ON d.id = {ITEMS_DESCRIPTION_FTS}.rowid "
+        f"WHERE {ITEMS_DESCRIPTION_FTS} MATCH :match "
+        f"ORDER BY bm25({ITEMS_DESCRIPTION_FTS}) LIMIT :limit")
+    return session.execute(stmt, {"match": " AND ".join(clauses), "limit": limit}).mappings().all()
+
+
+def _postgres_search(session, name_terms, desc_terms, limit):
+    # The GIN index covers name and description together, so terms are matched against both
+    query = func.to_tsquery('simple', " & ".join(f"{t}:*" for t in name_terms + desc_terms))
+    vector = text(_PG_VECTOR)
+    stmt = (select(ItemsDescription.id, ItemsDescription.part_name, ItemsDescription.part_description)
+            .where(vector.op('@@')(query))
+            .order_by(func.ts_rank(vector, query).desc())
+            .limit(limit))
+    return session.execute(stmt).mappings().all()
+
+
+def search_item_descriptions(session, part_name=None, part_description=None, limit=DEFAULT_SEARCH_LIMIT):
+    name_terms, desc_terms = _terms(part_name), _terms(part_description)
+    columns = (ItemsDescription.id, ItemsDescription.part_name, ItemsDescription.part_description)
+    if not name_terms and not desc_terms:
+        stmt = select(*columns).order_by(ItemsDescription.id).limit(limit)
+        return session.execute(stmt).mappings().all()
+
+    dialect = session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return _sqlite_search(session, name_terms, desc_terms, limit)
+    if dialect == 'postgresql':
+        return _postgres_search(session, name_terms, desc_terms, limit)
+
+    # No full-text support on this backend: fall back to substring scans
+    stmt = select(*columns)
+    if part_name:
+        stmt = stmt.where(ItemsDescription.part_name.ilike(f'%{part_name}%'))
+    if part_description:
+        stmt = stmt.where(ItemsDescription.part_description.ilike(f'%{part_description}%'))
+    return session.execute(stmt.limit(limit)).mappings().all()
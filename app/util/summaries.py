@@ -0,0 +1,176 @@
+from collections import Counter
+from sqlalchemy import event, select, delete, func, insert, text, and_, or_
+from sqlalchemy import inspect as sa_inspect
+from app.models import (Service_Ticket, Service_Popularity, Service_Popularity_Daily, Mechanics,
+                        Ticket_Mechanics, Mechanic_Ticket_Daily,
+                        MECHANIC_TICKET_DAILY_SQLITE, MECHANIC_TICKET_DAILY_POSTGRES)
+from app.util.dml import upsert_increment
+
+#  =========================================================================
+#  Pre-aggregated counters. ORM flushes are turned into +/-1 deltas per summary key
+#  and written with one upsert per table on the flush's own connection, so the
+#  summaries commit or roll back together with the rows they describe.
+#
+#  The service popularity counters follow service_tickets, which the app writes only
+#  through the ORM (bulk deletes call discount_service_tickets), so flush hooks see
+#  every change and work on any backend. The mechanic buckets follow ticket_mechanics,
+#  which is also written by secondary collections and Core DML (assign/unassign,
+#  bulk deletes) that never pass through the hooks; those use database triggers instead.
+
+
+def _old_value(state, key):
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else state.attrs[key].value
+
+
+def _collect_ticket_changes(session, flush_context, instances):
+    # Old values of deleted/updated tickets must be read before the flush removes them
+    deltas = Counter()
+    for obj in session.deleted:
+        if isinstance(obj, Service_Ticket):
+            state = sa_inspect(obj)
+            deltas[(_old_value(state, 'service_description'), _old_value(state, 'service_date'))] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Service_Ticket) and session.is_modified(obj):
+            state = sa_inspect(obj)
+            old = (_old_value(state, 'service_description'), _old_value(state, 'service_date'))
+            new = (obj.service_description, obj.service_date)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    session.info['service_ticket_deltas'] = deltas
+
+
+def _service_ticket_deltas(session):
+    deltas = session.info.pop('service_ticket_deltas', None) or Counter()
+    # New tickets are counted after the flush, once column defaults such as service_date are set
+    for obj in session.new:
+        if isinstance(obj, Service_Ticket):
+            deltas[(obj.service_description, obj.service_date)] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def _apply_popularity(session, connection, deltas):
+    totals = Counter()
+    for (description, _), delta in deltas.items():
+        totals[description] += delta
+    daily = [{"service_description": d, "service_date": day, "ticket_count": n} for (d, day), n in deltas.items()]
+    overall = [{"service_description": d, "ticket_count": n} for d, n in totals.items() if n]
+
+    upsert_increment(session, Service_Popularity_Daily.__table__, ['service_description', 'service_date'],
+                     'ticket_count', daily, connection)
+    upsert_increment(session, Service_Popularity.__table__, ['service_description'], 'ticket_count',
+                     overall, connection)
+    # Only keys that went down can have reached zero; look them up by primary key
+    emptied_days = [key for key, n in deltas.items() if n < 0]
+    if emptied_days:
+        connection.execute(delete(Service_Popularity_Daily).where(
+            or_(*(and_(Service_Popularity_Daily.service_description == d, Service_Popularity_Daily.service_date == day)
+                  for d, day in emptied_days)),
+            Service_Popularity_Daily.ticket_count <= 0))
+    emptied = [d for d, n in totals.items() if n < 0]
+    if emptied:
+        connection.execute(delete(Service_Popularity).where(
+            Service_Popularity.service_description.in_(emptied), Service_Popularity.ticket_count <= 0))
+
+
+def _maintain_summaries(session, flush_context):
+    deltas = _service_ticket_deltas(session)
+    if deltas:
+        _apply_popularity(session, session.connection(), deltas)
+
+
+def discount_service_tickets(session, ticket_filter):
+    # Bulk SQL deletes skip the flush hooks: subtract the tickets matched by ticket_filter
+    # from the popularity summaries before they are deleted.
+    rows = session.execute(
+        select(Service_Ticket.service_description, Service_Ticket.service_date, func.count())
+        .where(ticket_filter)
+        .group_by(Service_Ticket.service_description, Service_Ticket.service_date))
+    deltas = {(description, day): -count for description, day, count in rows}
+    if deltas:
+        _apply_popularity(session, session.connection(), deltas)
+
+
+def init_summary_maintenance(session):
+    listeners = (
+        ('before_flush', _collect_ticket_changes),
+        ('after_flush', _maintain_summaries),
+    )
+    for name, fn in listeners:
+        if not event.contains(session, name, fn):
+            event.listen(session, name, fn)
+
+
+def rebuild_service_popularity(session):
+    # Recompute the popularity summaries from service_tickets (backfill / repair after bulk SQL)
+    session.execute(delete(Service_Popularity_Daily))
+    session.execute(delete(Service_Popularity))
+    count = func.count(Service_Ticket.id)
+    session.execute(insert(Service_Popularity_Daily).from_select(
+        ['service_description', 'service_date', 'ticket_count'],
+        select(Service_Ticket.service_description, Service_Ticket.service_date, count)
+        .group_by(Service_Ticket.service_description, Service_Ticket.service_date)))
+    session.execute(insert(Service_Popularity).from_select(
+        ['service_description', 'ticket_count'],
+        select(Service_Ticket.service_description, count).group_by(Service_Ticket.service_description)))
+
+
+def rebuild_mechanic_ticket_daily(session):
+    # Recompute the per-mechanic buckets from ticket_mechanics (backfill / repair)
+    session.execute(delete(Mechanic_Ticket_Daily))
+    session.execute(insert(Mechanic_Ticket_Daily).from_select(
+        ['mechanic_id', 'service_date', 'ticket_count'],
+        select(Ticket_Mechanics.mechanic_id, Service_Ticket.service_date, func.count())
+        .join(Service_Ticket, Service_Ticket.id == Ticket_Mechanics.service_ticket_id)
+        .group_by(Ticket_Mechanics.mechanic_id, Service_Ticket.service_date)))
+
+
+def _install_bucket_triggers(session):
+    # Databases created before the buckets existed never ran the metadata after_create DDL
+    dialect = session.get_bind().dialect.name
+    statements = {'sqlite': MECHANIC_TICKET_DAILY_SQLITE, 'postgresql': MECHANIC_TICKET_DAILY_POSTGRES}
+    for stmt in statements.get(dialect, ()):
+        session.execute(text(stmt))
+
+
+def ensure_summaries(session):
+    # Backfill summaries for databases that already held tickets before the tables existed
+    if session.query(Service_Popularity.service_description).first() is None:
+        rebuild_service_popularity(session)
+    _install_bucket_triggers(session)
+    if session.query(Mechanic_Ticket_Daily.mechanic_id).first() is None:
+        rebuild_mechanic_ticket_daily(session)
+    session.commit()
+
+
+def popular_services(session, limit, date_from=None, date_to=None):
+    if date_from is None and date_to is None:
+        # All-time ranking is a walk down the ticket_count index
+        stmt = (select(Service_Popularity.service_description, Service_Popularity.ticket_count.label('usage_count'))
+                .order_by(Service_Popularity.ticket_count.desc())
+                .limit(limit))
+    else:
+        usage_count = func.sum(Service_Popularity_Daily.ticket_count).label('usage_count')
+        stmt = select(Service_Popularity_Daily.service_description, usage_count)
+        if date_from is not None:
+            stmt = stmt.where(Service_Popularity_Daily.service_date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Service_Popularity_Daily.service_date <= date_to)
+        stmt = stmt.group_by(Service_Popularity_Daily.service_description).order_by(usage_count.desc()).limit(limit)
+    return session.execute(stmt).all()
+
+
+def mechanic_leaderboard(session, limit, date_from=None, date_to=None):
+    # Mechanics ranked by assigned tickets, summed over the daily buckets in the window
+    ticket_count = func.sum(Mechanic_Ticket_Daily.ticket_count).label('ticket_count')
+    stmt = (select(Mechanics.id, Mechanics.first_name, Mechanics.last_name, Mechanics.email, ticket_count)
+            .join(Mechanic_Ticket_Daily, Mechanic_Ticket_Daily.mechanic_id == Mechanics.id))
+    if date_from is not None:
+        stmt = stmt.where(Mechanic_Ticket_Daily.service_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Mechanic_Ticket_Daily.service_date <= date_to)
+    stmt = stmt.group_by(Mechanics.id).order_by(ticket_count.desc(), Mechanics.id).limit(limit)
+    return session.execute(stmt).all()
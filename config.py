@@ -3,8 +3,28 @@ import os
 class DevelopmentConfig:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///mechanic_shop.db'
     DEBUG = True
-    CACHE_TYPE = "SimpleCache"
-    CACHE_DEFAULT_TIMEOUT = 300
+    # SimpleCache is per process. With several workers set CACHE_TYPE to a shared backend
+    # (FileSystemCache + CACHE_DIR, or RedisCache + CACHE_REDIS_URL) so cache
+    # invalidation reaches all of them.
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', "SimpleCache")
+    CACHE_DIR = os.environ.get('CACHE_DIR')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Password hashing: werkzeug method string with its work factor. Stored hashes made
+    # with other parameters are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_TIMEOUT = 5
+
+    # Access log: fraction of requests recorded (errors always are); ACCESS_LOG_DEBUG adds
+    # request headers and bodies to each record
+    ACCESS_LOG_SAMPLE_RATE = float(os.environ.get('ACCESS_LOG_SAMPLE_RATE', 1.0))
+    ACCESS_LOG_DEBUG = os.environ.get('ACCESS_LOG_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+    # Response compression: bodies below COMPRESS_MIN_SIZE bytes go out as they are
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
 
     # CORS settings (development)
     # Allow your Vite dev server and localhost
@@ -15,12 +35,22 @@ class DevelopmentConfig:
     CORS_SUPPORTS_CREDENTIALS = True
     CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     CORS_HEADERS = ["Content-Type", "Authorization", "X-Requested-With"]
+    # Seconds browsers may cache a preflight response
+    CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 600))
 
 class TestingConfig:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_mechanic_shop.db'
     DEBUG = True
     CACHE_TYPE = "SimpleCache"
 
+    # Cheap work factor keeps the suite fast
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_QUEUE_SIZE = 8
+
+    # Keep test output quiet; server errors are still logged
+    ACCESS_LOG_SAMPLE_RATE = 0.0
+
     # For tests it's often convenient to allow dev origins
     CORS_ORIGINS = [
         os.environ.get('CORS_ORIGIN_TEST', 'http://localhost:5173')
@@ -28,10 +58,24 @@ class TestingConfig:
     CORS_SUPPORTS_CREDENTIALS = True
     CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
     CORS_HEADERS = ["Content-Type", "Authorization", "X-Requested-With"]
+    CORS_MAX_AGE = 600
 
 class ProductionConfig:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI') or 'sqlite:///mechanic_shop.db'
-    CACHE_TYPE = "SimpleCache"
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', "SimpleCache")
+    CACHE_DIR = os.environ.get('CACHE_DIR')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_TIMEOUT = 5
+
+    ACCESS_LOG_SAMPLE_RATE = float(os.environ.get('ACCESS_LOG_SAMPLE_RATE', 0.1))
+    ACCESS_LOG_DEBUG = False
+
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
 
     # Production: allow your production API domain for all endpoints including /api/docs
     base_origins = [
@@ -57,4 +101,5 @@ class ProductionConfig:
         CORS_SUPPORTS_CREDENTIALS = False
         
     CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
-    CORS_HEADERS = ["Content-Type", "Authorization", "X-Requested-With", "Accept"]
\ No newline at end of file
+    CORS_HEADERS = ["Content-Type", "Authorization", "X-Requested-With", "Accept"]
+    CORS_MAX_AGE = int(os.environ.get('CORS_MAX_AGE', 7200))
\ No newline at end of file
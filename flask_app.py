@@ -1,5 +1,8 @@
 from app import create_app
 from app.models import db, Mechanics
+from app.util.search import ensure_search_index
+from app.util.summaries import ensure_summaries
+from app.util.indexes import ensure_indexes
 from sqlalchemy import inspect, text
 from werkzeug.security import generate_password_hash  # Import password hashing function
 import os
@@ -53,6 +56,9 @@ with app.app_context():
     
     # Now continue with the normal initialization
     db.create_all()   
+    ensure_indexes(db.session)
+    ensure_search_index(db.session)
+    ensure_summaries(db.session)
     
     # For debugging: Remove any existing user with this email (case insensitive)
     try:
@@ -0,0 +1,69 @@
+from app import create_app
+from app.models import db
+from app.util import access_log
+from app.util.auth import create_admin_token
+from unittest import mock
+import json
+import logging
+import unittest
+
+# python -m unittest tests.test_access_log
+
+class _Capture(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+
+    def emit(self, record):
+        self.entries.append(record.access)
+
+
+class TestAccessLog(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.app.config['ACCESS_LOG_SAMPLE_RATE'] = 1.0
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+        self.capture = _Capture()
+        patcher = mock.patch.object(access_log._listener, 'handlers', (self.capture,))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _entries(self):
+        access_log.flush_access_log()
+        return self.capture.entries
+
+# -------------------------------------------------------------------------------------------
+
+    def test_one_record_per_request(self):
+        headers = {"Authorization": "Bearer " + create_admin_token(5)}
+        self.client.get('/mechanics/?fields=id', headers=headers)
+        self.client.get('/health')
+        first, second = self._entries()
+        self.assertEqual((first['method'], first['route'], first['status']), ('GET', '/mechanics/', 200))
+        self.assertEqual((first['user_id'], first['role']), ('5', 'admin'))
+        self.assertGreaterEqual(first['latency_ms'], 0)
+        self.assertNotIn('headers', first)
+        self.assertIsNone(second['user_id'])
+
+    def test_debug_mode_dumps_redacted_headers_and_body(self):
+        self.app.config['ACCESS_LOG_DEBUG'] = True
+        self.client.post('/customers/login', json={"email": "x@email.com", "password": "pw"},
+                         headers={"Authorization": "Bearer secret"})
+        entry, = self._entries()
+        self.assertEqual(entry['headers']['Authorization'], '***')
+        self.assertEqual(json.loads(entry['body']), {"email": "x@email.com", "password": "***"})
+        self.assertNotIn('"pw"', entry['body'])
+
+    def test_sampling(self):
+        self.app.config['ACCESS_LOG_SAMPLE_RATE'] = 0.0
+        for _ in range(5):
+            self.client.get('/health')
+        self.assertEqual(self._entries(), [])
+
+if __name__ == "__main__":
+    unittest.main()
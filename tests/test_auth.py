@@ -0,0 +1,115 @@
+from app import create_app
+from app.util import auth
+from app.util.auth import (token_required, role_required, create_admin_token, create_customer_token,
+                           VerifiedTokenCache, token_cache, SECRET_KEY)
+from jose import jwt
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+import os
+import unittest
+import time
+
+# python -m unittest tests.test_auth
+# RUN_BENCHMARKS=1 python -m unittest tests.test_auth    (adds the timing report)
+
+BENCH_REQUESTS = 2000
+
+class TestAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        token_cache.clear()
+
+    def _protected(self):
+        @role_required(['admin'])
+        @token_required
+        def view(user_id, role):
+            return user_id
+        return view
+
+    def _call(self, view, token):
+        with self.app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            return view()
+
+# -------------------------------------------------------------------------------------------
+
+    def test_token_decoded_once_per_request(self):
+        # role_required outside token_required has to read the token itself
+        token = create_admin_token(7)
+        with mock.patch.object(auth.jwt, 'decode', wraps=jwt.decode) as decode:
+            self.assertEqual(self._call(self._protected(), token), "7")
+            self.assertEqual(decode.call_count, 1)
+            # A second request with the same token is served from the verified-token cache
+            self.assertEqual(self._call(self._protected(), token), "7")
+            self.assertEqual(decode.call_count, 1)
+
+    def test_rejected_tokens_are_not_cached(self):
+        response, status = self._call(self._protected(), create_admin_token(1) + "x")
+        self.assertEqual(status, 401)
+        self.assertEqual(response.json['message'], "Token is invalid!")
+        response, status = self._call(self._protected(), create_customer_token(1))
+        self.assertEqual(status, 403)
+
+        expired = jwt.encode({"sub": "1", "role": "admin",
+                              "exp": datetime.now(timezone.utc) - timedelta(seconds=1)}, SECRET_KEY, algorithm="HS256")
+        response, status = self._call(self._protected(), expired)
+        self.assertEqual(response.json['message'], "Token is expired!")
+        self.assertIsNone(token_cache.get(expired))
+
+    def test_cache_entries_expire_and_evict(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        cache.put("a", {"exp": time.time() + 60})
+        cache.put("b", {"exp": time.time() - 1})
+        cache.put("c", {"exp": time.time() + 60})
+        cache.put("d", {"exp": time.time() + 60})
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        cache.put("e", {"exp": time.time() + 60})
+        self.assertIsNotNone(cache.get("c"))
+        self.assertIsNone(cache.get("d"))
+
+    def test_identity_not_shared_within_a_pushed_app_context(self):
+        # Flask reuses an app context that is already pushed (scripts, workers, tests), so
+        # the decoded token must not outlive its request
+        @token_required
+        def whoami(user_id, role):
+            return user_id, role
+
+        with self.app.app_context():
+            self.assertEqual(self._call(whoami, create_admin_token(1)), ("1", "admin"))
+            self.assertEqual(self._call(whoami, create_customer_token(99)), ("99", "customer"))
+            response, status = self._call(self._protected(), create_customer_token(99))
+            self.assertEqual(status, 403)
+            with self.app.test_request_context():
+                response, status = whoami()
+            self.assertEqual(status, 401)
+            self.assertEqual(response.json['message'], "Token is missing!")
+
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), "set RUN_BENCHMARKS=1 to run benchmarks")
+    def test_auth_overhead_benchmark(self):
+        # Report only: per-request cost of token_required + role_required with a cold
+        # and a warm verified-token cache. Before the change both decorators decoded the
+        # token, i.e. the cold figure plus one more jwt.decode.
+        token = create_admin_token(1)
+        view = self._protected()
+
+        def per_request(clear):
+            started = time.perf_counter()
+            for _ in range(BENCH_REQUESTS):
+                if clear:
+                    token_cache.clear()
+                self._call(view, token)
+            return (time.perf_counter() - started) / BENCH_REQUESTS * 1e6
+
+        started = time.perf_counter()
+        for _ in range(BENCH_REQUESTS):
+            jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        decode = (time.perf_counter() - started) / BENCH_REQUESTS * 1e6
+
+        uncached, cached = per_request(clear=True), per_request(clear=False)
+        print(f"\nauth overhead per request: {uncached + decode:.1f}us decoding twice (before), "
+              f"{uncached:.1f}us decoding once, {cached:.1f}us from the token cache")
+
+if __name__ == "__main__":
+    unittest.main()
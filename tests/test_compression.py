@@ -0,0 +1,67 @@
+from app import create_app
+from app.models import Service_Ticket, Customers, db
+from app.util import compression
+from app.util.auth import create_admin_token
+from unittest import mock
+import unittest
+import gzip
+import json
+import zlib
+
+# python -m unittest tests.test_compression
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add_all(Service_Ticket(service_description=f"Job {i}", price=1.0, vin="VIN1234567890")
+                               for i in range(100))
+            db.session.add_all(Customers(first_name="C", last_name=str(i), email=f"c{i}@email.com", password="x")
+                               for i in range(100))
+            db.session.commit()
+        self.auth = {"Authorization": "Bearer " + create_admin_token(1)}
+
+# -------------------------------------------------------------------------------------------
+
+    def test_large_json_is_gzipped(self):
+        response = self.client.get('/customers/', headers=dict(self.auth, **{"Accept-Encoding": "gzip"}))
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(response.data))['customers']), 100)
+
+        response = self.client.get('/customers/', headers=dict(self.auth, **{"Accept-Encoding": "deflate"}))
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(len(json.loads(zlib.decompress(response.data))['customers']), 100)
+
+    def test_small_and_unnegotiated_responses_stay_plain(self):
+        response = self.client.get('/health', headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = self.client.get('/customers/', headers=self.auth)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(len(response.json['customers']), 100)
+
+    def test_cache_hits_reuse_compressed_bytes(self):
+        url = '/service_tickets/?limit=100'
+        gzip_headers = dict(self.auth, **{"Accept-Encoding": "gzip"})
+        first = self.client.get(url, headers=gzip_headers)
+        self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(first.headers['ETag'].startswith('W/'))
+
+        with mock.patch.object(compression, '_encode', wraps=compression._encode) as encode:
+            hit = self.client.get(url, headers=gzip_headers)
+            self.assertEqual(encode.call_count, 0)
+        self.assertEqual(hit.data, first.data)
+
+        plain = self.client.get(url, headers=self.auth)
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertEqual(plain.json, json.loads(gzip.decompress(first.data)))
+
+        revalidate = self.client.get(url, headers=dict(gzip_headers, **{"If-None-Match": first.headers['ETag']}))
+        self.assertEqual(revalidate.status_code, 304)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+from app import create_app
+from config import TestingConfig
+from unittest import mock
+import unittest
+
+# python -m unittest tests.test_cors
+
+ALLOWED = 'http://localhost:5173'
+
+class TestCors(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+
+# -------------------------------------------------------------------------------------------
+
+    def test_preflight_for_allowed_origin_is_cacheable(self):
+        response = self.client.options('/customers/', headers={"Origin": ALLOWED,
+                                                               "Access-Control-Request-Method": "POST"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], ALLOWED)
+        self.assertEqual(response.headers['Access-Control-Allow-Credentials'], 'true')
+        self.assertEqual(response.headers['Access-Control-Max-Age'], '600')
+        self.assertIn('Authorization', response.headers['Access-Control-Allow-Headers'])
+        self.assertIn('Origin', response.headers['Vary'])
+
+    def test_actual_response_headers(self):
+        response = self.client.get('/health', headers={"Origin": ALLOWED})
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], ALLOWED)
+        self.assertNotIn('Access-Control-Max-Age', response.headers)
+
+    def test_unknown_origin_gets_no_cors_headers(self):
+        response = self.client.options('/customers/', headers={"Origin": "https://evil.example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Access-Control-Allow-Origin', response.headers)
+        response = self.client.get('/health', headers={"Origin": "https://evil.example.com"})
+        self.assertNotIn('Access-Control-Allow-Origin', response.headers)
+
+    def test_wildcard_origin_drops_credentials(self):
+        with mock.patch.object(TestingConfig, 'CORS_ORIGINS', ['*']):
+            client = create_app('TestingConfig').test_client()
+        response = client.get('/health', headers={"Origin": "https://any.example.com"})
+        self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+        self.assertNotIn('Access-Control-Allow-Credentials', response.headers)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 from app import create_app
-from app.models import Customers, db
+from app.models import (Customers, Service_Ticket, Invoice, Mechanics, Service_Popularity,
+                        Mechanic_Ticket_Daily, db)
+from app.extenstions import table_version
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 import unittest
+from unittest import mock
 from werkzeug.security import  check_password_hash, generate_password_hash
 from app.util.auth import encode_token
 from app.util.auth import create_admin_token, create_mechanic_token, create_customer_token
@@ -26,6 +31,7 @@ class TestCustomers(unittest.TestCase):
             )
             db.session.add(self.customer)
             db.session.commit()
+            self.customer_id = self.customer.id
             self.customer_token = create_customer_token(self.customer.id)
             self.mechanic_token = create_mechanic_token(self.customer.id)
             self.admin_token = create_admin_token(self.customer.id)
@@ -103,7 +109,79 @@ class TestCustomers(unittest.TestCase):
         first_names = [c['first_name'] for c in response.json['customers']]
         self.assertIn("Test", first_names)
         self.assertIn("Alice", first_names)
+        self.assertTrue(all('password' not in c for c in response.json['customers']))
+
+    def test_get_customers_sparse_fields(self):
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/customers/?fields=email,id', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['customers'], [{"id": self.customer_id, "email": "test@email.com"}])
+        response = self.client.get('/customers/?fields=id,password', headers=headers)
+        self.assertEqual(response.status_code, 400)
             
+# -------------------------------------------------------------------------------------------
+
+    def test_bulk_import_customers_csv(self):
+        headers = {"Authorization": "Bearer " + self.admin_token, "Content-Type": "text/csv"}
+        body = ("first_name,last_name,email,password,phone\n"
+                "Ann,One,ann@email.com,pw1,555\n"
+                "Bob,Two,not-an-email,pw2,\n"
+                "Cat,Three,test@email.com,pw3,\n"
+                "Ann,Again,ann@email.com,pw4,\n"
+                "Dan,Four,dan@email.com,pw5,\n")
+        response = self.client.post('/customers/import', data=body, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['created'], 2)
+        self.assertEqual([e['row'] for e in response.json['errors']], [2, 3, 4])
+        with self.app.app_context():
+            ann = db.session.query(Customers).filter_by(email="ann@email.com").one()
+            self.assertTrue(check_password_hash(ann.password, "pw1"))
+            self.assertIsNone(db.session.query(Customers).filter_by(email="dan@email.com").one().phone)
+
+    def test_bulk_import_customers_ndjson(self):
+        headers = {"Authorization": "Bearer " + self.admin_token, "Content-Type": "application/x-ndjson"}
+        body = ('{"first_name": "Eve", "last_name": "Five", "email": "eve@email.com", "password": "pw"}\n'
+                'not json\n'
+                '{"first_name": "Fay", "last_name": "Six", "email": "fay@email.com"}\n')
+        response = self.client.post('/customers/import', data=body, headers=headers)
+        self.assertEqual(response.json['created'], 1)
+        self.assertEqual(response.json['errors'][0], {"row": 2, "errors": "invalid JSON"})
+        self.assertIn('password', response.json['errors'][1]['errors'])
+
+        headers["Authorization"] = "Bearer " + self.customer_token
+        response = self.client.post('/customers/import', data=body, headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_savepoints_bump_table_versions_on_outer_commit(self):
+        # The import path: inserts in savepoints, some of which fail and roll back
+        def row(email):
+            return {"first_name": "Sub", "last_name": "Point", "email": email, "password": "hashed"}
+        with self.app.app_context():
+            customers, tickets = table_version('customers'), table_version('service_tickets')
+            db.session.execute(insert(Customers), [row("outer@email.com")])
+            with db.session.begin_nested():
+                db.session.execute(insert(Customers), [row("released@email.com")])
+            # Releasing a savepoint commits nothing yet
+            self.assertEqual(table_version('customers'), customers)
+            with self.assertRaises(IntegrityError):
+                with db.session.begin_nested():
+                    db.session.execute(insert(Customers), [row("test@email.com")])
+            savepoint = db.session.begin_nested()
+            db.session.add(Service_Ticket(customer_id=1, service_description="Dropped", price=1.0, vin="VIN1"))
+            db.session.flush()
+            savepoint.rollback()
+            db.session.commit()
+            # The failed savepoints drop only their own tables
+            self.assertNotEqual(table_version('customers'), customers)
+            self.assertEqual(table_version('service_tickets'), tickets)
+
+    def test_hash_passwords_process_pool(self):
+        from app.util.passwords import hash_passwords
+        with self.app.app_context():
+            hashes = hash_passwords(["a", "b", "c"], workers=2)
+        self.assertTrue(all(h.startswith('pbkdf2:sha256:1000$') for h in hashes))
+        self.assertTrue(all(check_password_hash(h, p) for h, p in zip(hashes, "abc")))
+
 # -------------------------------------------------------------------------------------------
 
     def test_update_customer_role_access(self):
@@ -131,6 +209,37 @@ class TestCustomers(unittest.TestCase):
         response = self.client.post('/customers/login', json=login_creds)
         self.assertEqual(response.status_code, 200)
         self.assertIn('token', response.json)
+
+    def test_login_rehashes_outdated_password(self):
+        # setUp stored werkzeug's default scrypt hash; the testing config asks for pbkdf2
+        with self.app.app_context():
+            self.assertTrue(db.session.get(Customers, self.customer_id).password.startswith('scrypt:'))
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "123"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            stored = db.session.get(Customers, self.customer_id).password
+        self.assertTrue(stored.startswith('pbkdf2:sha256:1000$'))
+        self.assertTrue(check_password_hash(stored, "123"))
+        response = self.client.post('/customers/login', json={"email": "test@email.com", "password": "123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/health').json['password_hashing']['rejected'], 0)
+
+    def test_password_hash_pool_is_bounded(self):
+        from app.util.passwords import HashPool, PasswordHashingBusy
+        import threading
+        pool = HashPool(workers=1, queue_size=0)
+        release = threading.Event()
+        worker = threading.Thread(target=pool.run, args=(release.wait,))
+        worker.start()
+        while pool.stats()['running'] == 0:
+            release.wait(0.01)
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(len, "x", timeout=0)
+        release.set()
+        worker.join()
+        self.assertEqual(pool.run(len, "abc", timeout=1), 3)
+        stats = pool.stats()
+        self.assertEqual((stats['completed'], stats['rejected'], stats['queued']), (2, 1, 0))
         
 # ------------------------------------------------------------------------------------------- 
    
@@ -141,8 +250,49 @@ class TestCustomers(unittest.TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertIn('message', response.json)
         self.assertEqual(response.json['message'], "Token is missing!")
-    
-      
+
+# -------------------------------------------------------------------------------------------
+
+    def _add_customer_work(self):
+        with self.app.app_context():
+            mechanic = Mechanics(first_name="M", last_name="M", email="m@email.com", password="x", salary=1.0)
+            for i in range(3):
+                customer = Customers(first_name="C", last_name=str(i), email=f"c{i}@email.com", password="x")
+                ticket = Service_Ticket(customer=customer, service_description="Oil change", price=1.0, vin="VIN1")
+                ticket.mechanics.append(mechanic)
+                db.session.add(Invoice(customer=customer, service_ticket=ticket, price=1.0))
+            db.session.commit()
+
+    def test_delete_all_customers_dry_run_and_detach(self):
+        self._add_customer_work()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.delete('/customers?dry_run=true', headers=headers)
+        self.assertEqual(response.json['would_delete'],
+                         {"customers": 4, "service_tickets_detached": 3, "invoices_detached": 3})
+        with mock.patch('app.blueprints.customers.route.DELETE_CHUNK_SIZE', 2):
+            response = self.client.delete('/customers', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['chunks'], 2)
+        self.assertEqual(response.json['deleted']['customers'], 4)
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Customers).count(), 0)
+            self.assertEqual(db.session.query(Service_Ticket).filter(Service_Ticket.customer_id.is_(None)).count(), 3)
+
+    def test_delete_all_customers_cascade(self):
+        self._add_customer_work()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.delete('/customers?cascade=true&dry_run=true', headers=headers)
+        self.assertEqual(response.json['would_delete']['service_tickets'], 3)
+        response = self.client.delete('/customers?cascade=true', headers=headers)
+        self.assertEqual(response.json['deleted'], {"customers": 4, "service_tickets": 3, "invoices": 3,
+                                                    "ticket_mechanics": 3, "invoice_items": 0})
+        with self.app.app_context():
+            self.assertEqual(db.session.query(Service_Ticket).count(), 0)
+            self.assertEqual(db.session.query(Invoice).count(), 0)
+            # Summary tables follow the bulk delete
+            self.assertEqual(db.session.query(Service_Popularity).count(), 0)
+            self.assertEqual(db.session.query(Mechanic_Ticket_Daily).count(), 0)
+
 # -------------------------------------------------------------------------------------------
         
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+from app import create_app
+from app.models import (Service_Ticket, Ticket_Mechanics, Invoice, InventoryItem,
+                        ItemsDescription, db)
+from app.util.indexes import ensure_indexes
+from sqlalchemy import select, text, and_, or_
+from datetime import date
+import unittest
+
+# python -m unittest tests.test_indexes
+
+class TestIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+    def _plan(self, stmt):
+        # EXPLAIN QUERY PLAN details for a statement, bound with its own parameters
+        compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        with db.engine.connect() as connection:
+            rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+        return [row[-1] for row in rows]
+
+    def assertUsesIndex(self, stmt, table, index):
+        plan = self._plan(stmt)
+        self.assertTrue(any(f"INDEX {index}" in step for step in plan), plan)
+        self.assertNotIn(f"SCAN {table}", plan)
+        self.assertFalse(any("TEMP B-TREE" in step for step in plan), plan)
+
+# -------------------------------------------------------------------------------------------
+
+    def test_service_ticket_queries(self):
+        with self.app.app_context():
+            # GET /service_tickets/ keyset page after a cursor, as built by keyset_by_date
+            after = date(2024, 1, 1)
+            stmt = (select(Service_Ticket)
+                    .where(or_(Service_Ticket.service_date > after,
+                               and_(Service_Ticket.service_date == after, Service_Ticket.id > 10)))
+                    .order_by(Service_Ticket.service_date, Service_Ticket.id)
+                    .limit(51))
+            self.assertUsesIndex(stmt, 'service_tickets', 'ix_service_tickets_service_date')
+
+            self.assertUsesIndex(select(Service_Ticket).where(Service_Ticket.vin == 'VIN1'),
+                                 'service_tickets', 'ix_service_tickets_vin')
+
+    def test_ticket_mechanic_queries(self):
+        with self.app.app_context():
+            # GET /ticket_mechanics/<mechanic_id>/get_mechanic
+            stmt = (select(Service_Ticket.id)
+                    .join(Ticket_Mechanics, Ticket_Mechanics.service_ticket_id == Service_Ticket.id)
+                    .where(Ticket_Mechanics.mechanic_id == 3))
+            self.assertUsesIndex(stmt, 'ticket_mechanics', 'ix_ticket_mechanics_mechanic_id')
+            # GET /ticket_mechanics/get_ticket_customer
+            self.assertUsesIndex(select(Service_Ticket).where(Service_Ticket.customer_id == 3),
+                                 'service_tickets', 'ix_service_tickets_customer_id')
+
+    def test_customer_delete_queries(self):
+        with self.app.app_context():
+            # Dependents of a DELETE /customers/ chunk
+            customer_ids = [1, 2, 3]
+            ticket_ids = select(Service_Ticket.id).where(Service_Ticket.customer_id.in_(customer_ids))
+            stmt = select(Invoice.id).where(or_(Invoice.customer_id.in_(customer_ids),
+                                                Invoice.service_ticket_id.in_(ticket_ids)))
+            plan = self._plan(stmt)
+            for index in ('ix_invoices_customer_id', 'ix_invoices_service_ticket_id', 'ix_service_tickets_customer_id'):
+                self.assertTrue(any(f"INDEX {index}" in step for step in plan), plan)
+            self.assertFalse(any(step.startswith("SCAN") for step in plan), plan)
+
+    def test_invoice_and_inventory_queries(self):
+        with self.app.app_context():
+            # Service_Ticket.invoices / ItemsDescription.inventory_items relationship loads
+            self.assertUsesIndex(select(Invoice).where(Invoice.service_ticket_id == 7),
+                                 'invoices', 'ix_invoices_service_ticket_id')
+            stmt = (select(InventoryItem.id)
+                    .join(ItemsDescription, ItemsDescription.id == InventoryItem.items_description_id)
+                    .where(ItemsDescription.id == 2))
+            self.assertUsesIndex(stmt, 'inventory', 'ix_inventory_items_description_id')
+
+    def test_ensure_indexes_migrates_existing_database(self):
+        with self.app.app_context():
+            db.session.execute(text("DROP INDEX ix_service_tickets_vin"))
+            db.session.execute(text("DROP INDEX ix_ticket_mechanics_mechanic_id"))
+            db.session.commit()
+            ensure_indexes(db.session)
+            # Running it again on an up-to-date database is a no-op
+            ensure_indexes(db.session)
+            names = set(db.session.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'")))
+        self.assertTrue({'ix_service_tickets_vin', 'ix_ticket_mechanics_mechanic_id',
+                         'ix_invoices_customer_id', 'ix_inventory_items_description_id'}.issubset(names))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 from app import create_app
 from app.models import InventoryItem, ItemsDescription, db
+from app.extenstions import LOCAL_LIST_CACHE_TIMEOUT
+from unittest import mock
+import time
 import unittest
 
 # python -m unittest discover tests
@@ -52,6 +55,42 @@ class TestInventoryItems(unittest.TestCase):
         response = self.client.get('/inventory/', headers=headers)
         self.assertEqual(response.status_code, 200)
         self.assertTrue(any(i['name'] == "Oil Filter" for i in response.json))
+
+    def test_get_inventory_items_etag(self):
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/inventory/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        response = self.client.get('/inventory/', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+        payload = {"name": "Air Filter", "items_description_id": self.desc_id}
+        self.client.post('/inventory/', json=payload, headers=headers)
+        response = self.client.get('/inventory/', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertTrue(any(i['name'] == "Air Filter" for i in response.json))
+
+    def test_etag_follows_writes_on_other_workers(self):
+        # Two app instances stand in for two workers, each with its own SimpleCache
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        other_client = create_app('TestingConfig').test_client()
+        response = other_client.get('/inventory/', headers=headers)
+        etag = response.headers['ETag']
+
+        payload = {"name": "Air Filter", "items_description_id": self.desc_id}
+        self.client.post('/inventory/', json=payload, headers=headers)
+        # The other worker's cached list, and its tag, last until the local TTL runs out
+        response = other_client.get('/inventory/', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        later = time.time() + LOCAL_LIST_CACHE_TIMEOUT + 1
+        with mock.patch('cachelib.simple.time', return_value=later):
+            response = other_client.get('/inventory/', headers={**headers, "If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertTrue(any(i['name'] == "Air Filter" for i in response.json))
         
 # -------------------------------------------------------------------------------------------
         
@@ -0,0 +1,94 @@
+from app import create_app
+from app.models import Invoice, Invoice_Inventory_Link, InventoryItem, ItemsDescription, Service_Ticket, db
+from app.util.auth import create_admin_token, create_mechanic_token
+import unittest
+
+# python -m unittest tests.test_invoice
+
+class TestInvoiceLineItems(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            ticket = Service_Ticket(customer_id=1, service_description="Oil change", price=50.0, vin="VIN1234567890")
+            desc = ItemsDescription(part_name="Oil Filter", part_description="High quality oil filter", part_price=9.99)
+            db.session.add_all([ticket, desc])
+            db.session.commit()
+            item = InventoryItem(name="Oil Filter", items_description_id=desc.id)
+            invoice = Invoice(customer_id=1, service_ticket_id=ticket.id, price=100.0)
+            db.session.add_all([item, invoice])
+            db.session.commit()
+            self.invoice_id = invoice.id
+            self.inventory_item_id = item.id
+        self.admin_headers = {"Authorization": "Bearer " + create_admin_token(1)}
+
+# -------------------------------------------------------------------------------------------
+
+    def test_invoice_totals(self):
+        headers = self.admin_headers
+        payload = {"inventory_item_id": self.inventory_item_id, "quantity": 3}
+        self.client.post(f'/invoice/{self.invoice_id}/add_invoice_item', json=payload, headers=headers)
+        with self.app.app_context():
+            empty = Invoice(customer_id=1, service_ticket_id=1, price=10.0)
+            db.session.add(empty)
+            db.session.commit()
+            empty_id = empty.id
+
+        response = self.client.get(f'/invoice/{self.invoice_id}/total', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['parts_total'], 29.97)
+        self.assertEqual(response.json['quantity'], 3)
+
+        response = self.client.get(f'/invoice/totals?ids={self.invoice_id},{empty_id},9999', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        totals = {t['invoice_id']: t['parts_total'] for t in response.json['totals']}
+        self.assertEqual(totals, {self.invoice_id: 29.97, empty_id: 0})
+        self.assertEqual(response.json['not_found'], [9999])
+
+        response = self.client.get('/invoice/9999/total', headers=headers)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get('/invoice/totals?ids=a,b', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+# -------------------------------------------------------------------------------------------
+
+    def test_add_invoice_items_batch(self):
+        headers = {"Authorization": "Bearer " + create_mechanic_token(1)}
+        with self.app.app_context():
+            part = db.session.get(InventoryItem, self.inventory_item_id)
+            extra = InventoryItem(name="Spare filter", items_description_id=part.items_description_id)
+            db.session.add(extra)
+            db.session.commit()
+            extra_id = extra.id
+        url = f'/invoice/{self.invoice_id}/add_invoice_items'
+        payload = {"items": [{"inventory_item_id": self.inventory_item_id, "quantity": 2},
+                             {"inventory_item_id": extra_id},
+                             {"inventory_item_id": self.inventory_item_id, "quantity": 1}]}
+        response = self.client.post(url, json=payload, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json['items'], [{"inventory_item_id": self.inventory_item_id, "quantity": 3},
+                                                  {"inventory_item_id": extra_id, "quantity": 1}])
+
+        # Existing lines are incremented in the database, not replaced
+        payload = {"items": [{"inventory_item_id": extra_id, "quantity": 4}]}
+        response = self.client.post(url, json=payload, headers=headers)
+        self.assertEqual(response.json['items'], [{"inventory_item_id": extra_id, "quantity": 5}])
+
+        payload = {"items": [{"inventory_item_id": extra_id, "quantity": 1},
+                             {"inventory_item_id": 9999, "quantity": 1}]}
+        response = self.client.post(url, json=payload, headers=headers)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json['not_found'], [9999])
+        response = self.client.post(url, json={"items": [{"inventory_item_id": extra_id, "quantity": 0}]}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/invoice/9999/add_invoice_items', json={"items": [{"inventory_item_id": extra_id}]}, headers=headers)
+        self.assertEqual(response.status_code, 404)
+        with self.app.app_context():
+            link = db.session.get(Invoice_Inventory_Link, (self.invoice_id, extra_id))
+            self.assertEqual(link.quantity, 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+from app import create_app
+from app.models import Invoice, Invoice_Inventory_Link, InventoryItem, ItemsDescription, Service_Ticket, db
+from app.extenstions import limiter
+from app.util.auth import create_mechanic_token
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import unittest
+
+# python -m unittest tests.test_invoice_concurrency
+# RUN_BENCHMARKS=1 python -m unittest tests.test_invoice_concurrency    (adds the throughput report)
+
+THREADS = 8
+REQUESTS_PER_THREAD = 25
+
+class TestInvoiceItemConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        # The per-route limit would reject most of these requests
+        limiter.enabled = False
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            ticket = Service_Ticket(customer_id=1, service_description="Brake job", price=50.0, vin="VIN1234567890")
+            desc = ItemsDescription(part_name="Brake pad", part_description="Front brake pad", part_price=20.0)
+            db.session.add_all([ticket, desc])
+            db.session.commit()
+            item = InventoryItem(name="Brake pad", items_description_id=desc.id)
+            invoice = Invoice(service_ticket_id=ticket.id, price=100.0)
+            db.session.add_all([item, invoice])
+            db.session.commit()
+            self.invoice_id = invoice.id
+            self.inventory_item_id = item.id
+        self.headers = {"Authorization": "Bearer " + create_mechanic_token(1)}
+
+    def tearDown(self):
+        limiter.enabled = True
+
+    def _add_items(self, count):
+        client = self.app.test_client()
+        statuses = []
+        for _ in range(count):
+            response = client.post(f'/invoice/{self.invoice_id}/add_invoice_item', headers=self.headers,
+                                   json={"inventory_item_id": self.inventory_item_id, "quantity": 1})
+            statuses.append(response.status_code)
+        return statuses
+
+# -------------------------------------------------------------------------------------------
+
+    def _add_concurrently(self):
+        # Every thread posts REQUESTS_PER_THREAD increments; checks the statuses and the total
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            results = list(pool.map(self._add_items, [REQUESTS_PER_THREAD] * THREADS))
+
+        total = THREADS * REQUESTS_PER_THREAD
+        statuses = [status for result in results for status in result]
+        self.assertEqual(statuses, [201] * total)
+        with self.app.app_context():
+            link = db.session.get(Invoice_Inventory_Link, (self.invoice_id, self.inventory_item_id))
+            self.assertEqual(link.quantity, total)
+        return total
+
+    def test_concurrent_add_invoice_item_keeps_every_increment(self):
+        self._add_concurrently()
+
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), "set RUN_BENCHMARKS=1 to run benchmarks")
+    def test_concurrent_add_invoice_item_throughput(self):
+        # Report only: the totals are checked, the rate is printed
+        started = time.perf_counter()
+        total = self._add_concurrently()
+        elapsed = time.perf_counter() - started
+        print(f"\nadd_invoice_item: {total} requests from {THREADS} threads in {elapsed:.2f}s "
+              f"({total / elapsed:.0f} req/s)")
+
+if __name__ == "__main__":
+    unittest.main()
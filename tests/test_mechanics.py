@@ -125,6 +125,16 @@ class TestMechanics(unittest.TestCase):
         emails = [m['email'] for m in response.json]
         self.assertIn("testmech@email.com", emails)
         self.assertIn("alice@email.com", emails)
+        self.assertTrue(all('password' not in m for m in response.json))
+
+    def test_get_mechanics_sparse_fields(self):
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/mechanics/?fields=id,first_name,email', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        for mechanic in response.json:
+            self.assertEqual(set(mechanic), {"id", "first_name", "email"})
+        response = self.client.get('/mechanics/?fields=password', headers=headers)
+        self.assertEqual(response.status_code, 400)
         
 # -------------------------------------------------------------------------------------------        
 
@@ -166,6 +176,28 @@ class TestMechanics(unittest.TestCase):
         response = self.client.get('/mechanics/profile', headers=headers)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json['email'], "testmech@email.com")
+
+    def test_get_mechanic_profile_cached_per_user(self):
+        with self.app.app_context():
+            other = Mechanics(
+                first_name="Other",
+                last_name="Mechanic",
+                email="othermech@email.com",
+                password=generate_password_hash('123'),
+                salary=50000.0,
+                address="1 Other St"
+            )
+            db.session.add(other)
+            db.session.commit()
+            other_id = other.id
+        headers = {"Authorization": "Bearer " + self.mechanic_token}
+        other_headers = {"Authorization": "Bearer " + create_mechanic_token(other_id)}
+        self.assertEqual(self.client.get('/mechanics/profile', headers=headers).json['email'], "testmech@email.com")
+        self.assertEqual(self.client.get('/mechanics/profile', headers=other_headers).json['email'], "othermech@email.com")
+
+        response = self.client.put(f'/mechanics/{other_id}', json={"first_name": "Renamed"}, headers=other_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/mechanics/profile', headers=other_headers).json['first_name'], "Renamed")
        
    
         
@@ -190,6 +222,28 @@ class TestMechanics(unittest.TestCase):
        
       
         
+# -------------------------------------------------------------------------------------------
+
+    def test_delete_all_mechanics_keeps_protected(self):
+        from app.models import Service_Ticket, Ticket_Mechanics
+        with self.app.app_context():
+            crew = [Mechanics(first_name="Crew", last_name=str(i), email=f"crew{i}@email.com",
+                              password="x", salary=1.0) for i in range(3)]
+            ticket = Service_Ticket(service_description="Brakes", price=1.0, vin="VIN1")
+            ticket.mechanics.extend([db.session.get(Mechanics, 1)] + crew)
+            db.session.add(ticket)
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.delete('/mechanics', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json['deleted'], response.json['unassigned']), (3, 3))
+        self.assertIn("Protected mechanic (id=1) preserved", response.json['message'])
+        with self.app.app_context():
+            self.assertEqual([m.id for m in db.session.query(Mechanics)], [1])
+            self.assertEqual([tm.mechanic_id for tm in db.session.query(Ticket_Mechanics)], [1])
+        response = self.client.delete('/mechanics', headers=headers)
+        self.assertEqual(response.json['message'], "No mechanics deleted. Protected mechanic preserved.")
+
 # -------------------------------------------------------------------------------------------
 
     def test_unauthorized_delete_mechanic(self):
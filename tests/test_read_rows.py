@@ -0,0 +1,91 @@
+from app import create_app
+from app.models import Invoice, Ticket_Mechanics, db
+from app.blueprints.invoice.schema import invoice_row
+from app.util.fieldsets import read_rows
+from app.util.serializers import row_serializer, dump_rows
+from app.util.auth import create_admin_token
+from sqlalchemy import insert
+from datetime import datetime
+import os
+import time
+import tracemalloc
+import unittest
+
+# python -m unittest tests.test_read_rows
+# RUN_BENCHMARKS=1 python -m unittest tests.test_read_rows    (adds the memory/latency report)
+
+ROWS = 10000
+
+class TestReadRows(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.execute(insert(Invoice), [
+                {"service_ticket_id": i % 50 + 1, "price": float(i), "invoice_date": datetime(2024, 1, 1, i % 24)}
+                for i in range(ROWS)])
+            db.session.execute(insert(Ticket_Mechanics), [
+                {"service_ticket_id": 2, "mechanic_id": 1}, {"service_ticket_id": 1, "mechanic_id": 2}])
+            db.session.commit()
+        self.auth = {"Authorization": "Bearer " + create_admin_token(1)}
+
+    def _measure(self, read):
+        # (result, ms, peak KiB) of one read + dump, starting from an empty session
+        with self.app.app_context():
+            tracemalloc.start()
+            started = time.perf_counter()
+            result = read()
+            elapsed = (time.perf_counter() - started) * 1000
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+        return result, elapsed, peak
+
+# -------------------------------------------------------------------------------------------
+
+    def test_rows_are_not_tracked(self):
+        with self.app.app_context():
+            rows = read_rows(db.session, Ticket_Mechanics)
+            self.assertEqual([dict(row) for row in rows], [
+                {"service_ticket_id": 1, "mechanic_id": 2}, {"service_ticket_id": 2, "mechanic_id": 1}])
+            rows = read_rows(db.session, Invoice, ('id', 'price'), where=[Invoice.id <= 2])
+            self.assertEqual([dict(row) for row in rows], [{"id": 1, "price": 0.0}, {"id": 2, "price": 1.0}])
+            self.assertEqual(len(db.session.identity_map), 0)
+
+    def test_list_routes(self):
+        response = self.client.get('/ticket_mechanics/', headers=self.auth)
+        self.assertEqual(response.json, [{"mechanic_id": 2, "service_ticket_id": 1},
+                                         {"mechanic_id": 1, "service_ticket_id": 2}])
+        response = self.client.get('/ticket_mechanics/2/get_ticket_mechanic', headers=self.auth)
+        self.assertEqual(response.json, [{"mechanic_id": 1, "service_ticket_id": 2}])
+        response = self.client.get('/invoice/', headers=self.auth)
+        self.assertEqual(len(response.json), ROWS)
+        self.assertEqual(response.json[0]["invoice_date"], "2024-01-01T00:00:00")
+
+    def test_10k_rows_skip_the_identity_map(self):
+        with self.app.app_context():
+            # Same serializer on both sides: the only difference is ORM hydration
+            invoices = db.session.query(Invoice).all()
+            self.assertEqual(len(db.session.identity_map), ROWS)
+            expected = dump_rows(row_serializer(Invoice), invoices)
+        with self.app.app_context():
+            rows = read_rows(db.session, Invoice)
+            self.assertEqual(len(db.session.identity_map), 0)
+            self.assertEqual(dump_rows(invoice_row, rows), expected)
+
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), "set RUN_BENCHMARKS=1 to run benchmarks")
+    def test_memory_and_latency_report_10k_rows(self):
+        # Report only: ORM instances (before) against read_rows (after), same serializer
+        orm, orm_ms, orm_kib = self._measure(
+            lambda: dump_rows(row_serializer(Invoice), db.session.query(Invoice).all()))
+        core, core_ms, core_kib = self._measure(
+            lambda: dump_rows(invoice_row, read_rows(db.session, Invoice)))
+
+        self.assertEqual(core, orm)
+        print(f"\n{ROWS} invoices: ORM instances {orm_ms:.1f} ms, peak {orm_kib:.0f} KiB; "
+              f"read_rows {core_ms:.1f} ms, peak {core_kib:.0f} KiB")
+
+if __name__ == "__main__":
+    unittest.main()
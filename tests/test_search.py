@@ -75,6 +75,88 @@ class TestSearch(unittest.TestCase):
         response = self.client.get('/service_tickets/popular', headers=headers)
         self.assertEqual(response.status_code, 200)
         self.assertIsInstance(response.json, list)
+
+    def test_popular_service_tickets_follow_writes(self):
+        from app.util.auth import create_admin_token
+        from datetime import date
+        headers = {"Authorization": "Bearer " + create_admin_token(self.mechanic_id)}
+        with self.app.app_context():
+            old = Service_Ticket(service_description="Tire rotation", price=30.0, vin="VIN1",
+                                 service_date=date(2020, 6, 1))
+            extra = Service_Ticket(service_description="Tire rotation", price=30.0, vin="VIN2")
+            db.session.add_all([old, extra])
+            db.session.commit()
+            extra_id = extra.id
+        response = self.client.get('/service_tickets/popular?limit=1', headers=headers)
+        self.assertEqual(response.json, [{"service_description": "Tire rotation", "usage_count": 3}])
+
+        response = self.client.get('/service_tickets/popular?from=2020-01-01&to=2020-12-31', headers=headers)
+        self.assertEqual(response.json, [{"service_description": "Tire rotation", "usage_count": 1}])
+
+        with self.app.app_context():
+            ticket = db.session.get(Service_Ticket, extra_id)
+            ticket.service_description = "Oil change"
+            db.session.commit()
+            db.session.delete(db.session.get(Service_Ticket, self.ticket_ids[1]))
+            db.session.commit()
+        response = self.client.get('/service_tickets/popular', headers=headers)
+        self.assertEqual(response.json, [
+            {"service_description": "Oil change", "usage_count": 2},
+            {"service_description": "Tire rotation", "usage_count": 1},
+        ])
+        response = self.client.get('/service_tickets/popular?limit=zero', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_popularity_upsert_fallback_on_other_dialects(self):
+        # Backends without ON CONFLICT / ON DUPLICATE KEY go through UPDATE, then INSERT
+        from app.models import Service_Popularity
+        from app.util import dml
+        from unittest import mock
+        with self.app.app_context():
+            with mock.patch.object(db.engine.dialect, 'name', 'generic'), \
+                    mock.patch.object(dml, '_update_then_insert', wraps=dml._update_then_insert) as fallback:
+                db.session.add_all([Service_Ticket(service_description="Alignment", price=80.0, vin="VIN1"),
+                                    Service_Ticket(service_description="Alignment", price=80.0, vin="VIN2")])
+                db.session.commit()
+                db.session.add(Service_Ticket(service_description="Alignment", price=80.0, vin="VIN3"))
+                db.session.commit()
+            self.assertTrue(fallback.called)
+            counts = dict(db.session.execute(db.select(Service_Popularity.service_description,
+                                                       Service_Popularity.ticket_count)).all())
+        self.assertEqual(counts["Alignment"], 3)
+
+    def test_popularity_cleanup_is_scoped_to_changed_keys(self):
+        # Emptied summary rows are deleted by key, not by scanning the whole table
+        from app.models import Service_Popularity_Daily
+        from sqlalchemy import event, insert
+        from datetime import date
+        with self.app.app_context():
+            ticket = Service_Ticket(service_description="Wiper swap", price=15.0, vin="VIN1",
+                                    service_date=date(2021, 3, 4))
+            db.session.add(ticket)
+            db.session.execute(insert(Service_Popularity_Daily).values(
+                service_description="Stale", service_date=date(2019, 1, 1), ticket_count=0))
+            db.session.commit()
+
+            deletes = []
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if statement.startswith("DELETE FROM service_popularity"):
+                    deletes.append((statement, parameters))
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                db.session.delete(ticket)
+                db.session.commit()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+
+            days = db.session.execute(db.select(Service_Popularity_Daily.service_description)).scalars().all()
+            self.assertNotIn("Wiper swap", days)
+            self.assertIn("Stale", days)
+            self.assertEqual(len(deletes), 2)
+            with db.engine.connect() as connection:
+                for statement, parameters in deletes:
+                    plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+                    self.assertFalse(any(step.startswith("SCAN service_popularity") for step in plan), plan)
      
 # -------------------------------------------------------------------------------------------                
 
@@ -94,7 +176,7 @@ class TestSearch(unittest.TestCase):
         
         response = self.client.get(f'/service_tickets/?mechanic_id={self.mechanic_id}', headers=headers)
         self.assertEqual(response.status_code, 200)
-        ticket_ids = [t['id'] for t in response.json]
+        ticket_ids = [t['id'] for t in response.json['service_tickets']]
         for tid in self.ticket_ids:
             self.assertIn(tid, ticket_ids)
 # -------------------------------------------------------------------------------------------            
@@ -167,5 +249,52 @@ class TestSearch(unittest.TestCase):
         found = any(i.get('part_name') == 'Cabin Filter' for i in response.json)
         self.assertTrue(found)            
 
+# -------------------------------------------------------------------------------------------
+
+    def test_search_inventory_ranked_and_limited(self):
+        from app.models import ItemsDescription
+        with self.app.app_context():
+            for i in range(5):
+                db.session.add(ItemsDescription(
+                    part_name=f"Brake Pad {i}",
+                    part_description="Ceramic brake pad" if i == 3 else "Pad for the brake caliper",
+                    part_price=20.0
+                ))
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.token}
+        response = self.client.get('/inventory/search?part_name=bra&limit=2', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+        response = self.client.get('/inventory/search?part_description=ceramic', headers=headers)
+        self.assertEqual([i['part_name'] for i in response.json], ["Brake Pad 3"])
+
+    def test_search_index_follows_item_description_writes(self):
+        from app.util.auth import create_admin_token
+        admin_headers = {"Authorization": "Bearer " + create_admin_token(self.mechanic_id)}
+        headers = {"Authorization": "Bearer " + self.token}
+        response = self.client.post('/item_descriptions/', json={
+            "part_name": "Spark Plug",
+            "part_description": "Iridium spark plug",
+            "part_price": 7.5
+        }, headers=admin_headers)
+        self.assertEqual(response.status_code, 201)
+        desc_id = response.json['id']
+        response = self.client.get('/inventory/search?part_name=spark', headers=headers)
+        self.assertEqual([i['id'] for i in response.json], [desc_id])
+
+        self.client.put(f'/item_descriptions/{desc_id}', json={
+            "part_name": "Glow Plug",
+            "part_description": "Diesel glow plug",
+            "part_price": 9.5
+        }, headers=admin_headers)
+        response = self.client.get('/inventory/search?part_name=spark', headers=headers)
+        self.assertEqual(response.json, [])
+        response = self.client.get('/inventory/search?part_name=glow', headers=headers)
+        self.assertEqual([i['id'] for i in response.json], [desc_id])
+
+        self.client.delete(f'/item_descriptions/{desc_id}', headers=admin_headers)
+        response = self.client.get('/inventory/search?part_name=glow', headers=headers)
+        self.assertEqual(response.json, [])
+
 if __name__ == "__main__":
     unittest.main()
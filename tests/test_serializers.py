@@ -0,0 +1,90 @@
+from app import create_app
+from app.models import Service_Ticket, Invoice, Customers, db
+from app.blueprints.service_tickets.schema import service_tickets_schema, service_ticket_row
+from app.blueprints.invoice.schema import invoices_schema, invoice_row
+from app.blueprints.customers.schema import CustomerSchema, customer_list_fields
+from app.util.fieldsets import read_rows
+from app.util.serializers import row_serializer, dump_rows
+from datetime import date, datetime
+import os
+import time
+import unittest
+
+# python -m unittest tests.test_serializers
+# RUN_BENCHMARKS=1 python -m unittest tests.test_serializers    (adds the timing report)
+
+ROWS = 10000
+
+class TestSerializers(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+
+# -------------------------------------------------------------------------------------------
+
+    def test_matches_marshmallow_dump(self):
+        with self.app.app_context():
+            db.session.add_all([
+                Service_Ticket(service_description="Brakes", price=120.5, vin="VIN1", service_date=date(2024, 3, 1)),
+                Service_Ticket(customer_id=None, service_description="Oil", price=30, vin="VIN2"),
+                Invoice(service_ticket_id=1, price=99.0, invoice_date=datetime(2024, 3, 2, 10, 30)),
+                Invoice(service_ticket_id=2, price=10.0, invoice_date=None, submitted=True),
+                Customers(first_name="Ann", last_name="Lee", email="ann@email.com", password="x"),
+            ])
+            db.session.commit()
+
+            tickets = db.session.query(Service_Ticket).all()
+            self.assertEqual(dump_rows(service_ticket_row, tickets), service_tickets_schema.dump(tickets))
+            invoices = db.session.query(Invoice).all()
+            self.assertEqual(dump_rows(invoice_row, read_rows(db.session, Invoice)), invoices_schema.dump(invoices))
+
+            # Column-projected mappings, as the ?fields= list endpoints read them
+            fields = ('id', 'email')
+            customers = db.session.query(Customers).all()
+            self.assertEqual(dump_rows(row_serializer(Customers, fields, mapping=True), read_rows(db.session, Customers, fields)),
+                             CustomerSchema(many=True, only=fields).dump(customers))
+            rows = read_rows(db.session, Customers, customer_list_fields)
+            self.assertNotIn('password', row_serializer(Customers, customer_list_fields, mapping=True)(rows[0]))
+
+    def test_serializers_are_shared_per_field_set(self):
+        self.assertIs(row_serializer(Customers, ('id',)), row_serializer(Customers, ('id',)))
+        self.assertEqual(row_serializer(Service_Ticket).fields[0], 'id')
+        with self.assertRaises(ValueError):
+            row_serializer(Customers, ('id', 'nope'))
+
+    def _seed_tickets(self):
+        db.session.add_all(Service_Ticket(service_description=f"Job {i}", price=float(i), vin="VIN1234567890",
+                                          service_date=date(2024, 1, 1 + i % 28))
+                           for i in range(ROWS))
+        db.session.commit()
+        return db.session.query(Service_Ticket).all()
+
+    def test_matches_marshmallow_at_10k_rows(self):
+        with self.app.app_context():
+            tickets = self._seed_tickets()
+            self.assertEqual(dump_rows(service_ticket_row, tickets), service_tickets_schema.dump(tickets))
+
+    @unittest.skipUnless(os.environ.get('RUN_BENCHMARKS'), "set RUN_BENCHMARKS=1 to run benchmarks")
+    def test_benchmark_10k_rows(self):
+        # Report only: marshmallow against the compiled serializer on the same instances
+        with self.app.app_context():
+            tickets = self._seed_tickets()
+
+            started = time.perf_counter()
+            expected = service_tickets_schema.dump(tickets)
+            marshmallow_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            compiled = dump_rows(service_ticket_row, tickets)
+            compiled_ms = (time.perf_counter() - started) * 1000
+
+        self.assertEqual(compiled, expected)
+        print(f"\n{ROWS} service tickets: marshmallow {marshmallow_ms:.1f} ms, "
+              f"compiled {compiled_ms:.1f} ms ({marshmallow_ms / compiled_ms:.1f}x)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ from app.models import Service_Ticket, db
 import unittest
 from werkzeug.security import generate_password_hash
 from datetime import date
+import json
 from app.util.auth import create_admin_token, create_mechanic_token
 
 #  python -m unittest discover tests
@@ -121,7 +122,44 @@ class TestServiceTickets(unittest.TestCase):
         headers = {"Authorization": "Bearer " + self.mechanic_token}
         response = self.client.get('/service_tickets/', headers=headers)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(any(t['service_description'] == "Oil Change" for t in response.json))
+        self.assertTrue(any(t['service_description'] == "Oil Change" for t in response.json['service_tickets']))
+        self.assertIsNone(response.json['next_cursor'])
+
+    def test_get_service_tickets_paginated(self):
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(Service_Ticket(
+                    customer_id=1,
+                    service_description=f"Inspection {i}",
+                    price=10.0,
+                    vin="1HGCM82633A004352",
+                    service_date=date.today()
+                ))
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.mechanic_token}
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            url = '/service_tickets/?limit=2' + (f'&after={cursor}' if cursor else '')
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json['service_tickets']), 2)
+            seen.extend(t['id'] for t in response.json['service_tickets'])
+            pages += 1
+            cursor = response.json['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_get_service_tickets_invalid_cursor(self):
+        headers = {"Authorization": "Bearer " + self.mechanic_token}
+        response = self.client.get('/service_tickets/?after=not-a-cursor', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/service_tickets/?limit=abc', headers=headers)
+        self.assertEqual(response.status_code, 400)
         
 # -------------------------------------------------------------------------------------------         
 
@@ -164,7 +202,36 @@ class TestServiceTickets(unittest.TestCase):
     
 # ------------------------------------------------------------------------------------------- 
 
-    
+    def test_export_service_tickets_ndjson(self):
+        with self.app.app_context():
+            db.session.add(Service_Ticket(
+                customer_id=1,
+                service_description="Old Inspection",
+                price=10.0,
+                vin="1HGCM82633A004352",
+                service_date=date(2020, 1, 15)
+            ))
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/service_tickets/export', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 2)
+
+        response = self.client.get('/service_tickets/export?from=2020-01-01&to=2020-12-31', headers=headers)
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([r['service_description'] for r in rows], ["Old Inspection"])
+
+    def test_export_service_tickets_requires_admin(self):
+        headers = {"Authorization": "Bearer " + self.mechanic_token}
+        response = self.client.get('/service_tickets/export', headers=headers)
+        self.assertEqual(response.status_code, 403)
+        headers = {"Authorization": "Bearer " + self.admin_token}
+        response = self.client.get('/service_tickets/export?from=yesterday', headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+# ------------------------------------------------------------------------------------------- 
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,10 @@
 from app import create_app
 from app.models import Ticket_Mechanics, Service_Ticket, Mechanics, db
 from app.util.auth import create_admin_token
+from app.extenstions import cache, list_cache_timeout, LIST_CACHE_TIMEOUT
+import tempfile
 import unittest
+from sqlalchemy import event
 from datetime import date
 from werkzeug.security import generate_password_hash
 
@@ -72,6 +75,54 @@ class TestTicketMechanics(unittest.TestCase):
             for t in response.json
         ))
         
+    def test_get_ticket_mechanics_invalidated_on_assign(self):
+        response = self.client.get('/ticket_mechanics/', headers=self.auth_header)
+        self.assertEqual(len(response.json), 1)
+        with self.app.app_context():
+            new_mechanic = Mechanics(
+                first_name="Crew",
+                last_name="Member",
+                email="crew@email.com",
+                password="hashed",
+                salary=40000.0
+            )
+            db.session.add(new_mechanic)
+            db.session.commit()
+            new_mechanic_id = new_mechanic.id
+        response = self.client.post(f'/ticket_mechanics/{self.service_ticket_id}/assign_mechanics',
+                                    json={"mechanic_ids": [new_mechanic_id]}, headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/ticket_mechanics/', headers=self.auth_header)
+        self.assertTrue(any(t['mechanic_id'] == new_mechanic_id for t in response.json))
+
+    def test_list_cache_timeout_follows_backend(self):
+        # Per-process SimpleCache keeps list entries short-lived
+        self.assertEqual(self.app.config['CACHE_DEFAULT_TIMEOUT'], 30)
+        self.assertEqual(list_cache_timeout('FileSystemCache'), LIST_CACHE_TIMEOUT)
+
+    def test_shared_cache_invalidates_across_workers(self):
+        # Two app instances stand in for two worker processes sharing one cache directory
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        other = create_app('TestingConfig')
+        for app in (self.app, other):
+            cache.init_app(app, config={'CACHE_TYPE': 'FileSystemCache', 'CACHE_DIR': cache_dir.name})
+        other_client = other.test_client()
+
+        response = other_client.get('/ticket_mechanics/', headers=self.auth_header)
+        self.assertEqual(len(response.json), 1)
+        with self.app.app_context():
+            crew = Mechanics(first_name="Crew", last_name="Member", email="crew@email.com",
+                             password="hashed", salary=40000.0)
+            db.session.add(crew)
+            db.session.commit()
+            crew_id = crew.id
+        response = self.client.post(f'/ticket_mechanics/{self.service_ticket_id}/assign_mechanics',
+                                    json={"mechanic_ids": [crew_id]}, headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        response = other_client.get('/ticket_mechanics/', headers=self.auth_header)
+        self.assertEqual(len(response.json), 2)
+
 # -------------------------------------------------------------------------------------------        
 
     def test_get_ticket_mechanic(self):
@@ -157,5 +208,119 @@ class TestTicketMechanics(unittest.TestCase):
         else:
             self.fail(f"Unexpected status code: {response.status_code}, response: {response.json}")
 
+# -------------------------------------------------------------------------------------------
+
+    def test_bulk_assign_and_unassign_mechanics(self):
+        with self.app.app_context():
+            crew = [Mechanics(first_name="Crew", last_name=str(i), email=f"bulk{i}@email.com",
+                              password="hashed", salary=1.0) for i in range(3)]
+            db.session.add_all(crew)
+            db.session.commit()
+            crew_ids = [m.id for m in crew]
+        url = f'/ticket_mechanics/{self.service_ticket_id}'
+        response = self.client.post(f'{url}/assign_mechanics', headers=self.auth_header,
+                                    json={"mechanic_ids": crew_ids + [self.mechanic_id, 9999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['assigned'], sorted(crew_ids))
+        self.assertEqual(response.json['already_assigned'], [self.mechanic_id])
+        self.assertEqual(response.json['not_found'], [9999])
+
+        response = self.client.post(f'{url}/assign_mechanics', headers=self.auth_header,
+                                    json={"mechanic_ids": crew_ids})
+        self.assertEqual(response.json['assigned'], [])
+
+        response = self.client.delete(f'{url}/unassign_mechanics', headers=self.auth_header,
+                                      json={"mechanic_ids": crew_ids[:2] + [9999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['unassigned'], sorted(crew_ids[:2]))
+        self.assertEqual(response.json['not_assigned'], [9999])
+        with self.app.app_context():
+            remaining = {tm.mechanic_id for tm in db.session.query(Ticket_Mechanics)
+                         .filter_by(service_ticket_id=self.service_ticket_id)}
+        self.assertEqual(remaining, {self.mechanic_id, crew_ids[2]})
+
+    def test_assign_mechanics_invalid_payload(self):
+        url = f'/ticket_mechanics/{self.service_ticket_id}/assign_mechanics'
+        response = self.client.post(url, headers=self.auth_header, json={"mechanic_ids": "1,2"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/ticket_mechanics/9999/assign_mechanics', headers=self.auth_header,
+                                    json={"mechanic_ids": [self.mechanic_id]})
+        self.assertEqual(response.status_code, 404)
+
+    def _count_queries(self, url):
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url, headers=self.auth_header)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return response, len(statements)
+
+    def _add_tickets(self, count):
+        with self.app.app_context():
+            helper = db.session.get(Mechanics, self.mechanic_id)
+            for i in range(count):
+                crew = Mechanics(first_name="Crew", last_name=str(i), email=f"crew{count}-{i}@email.com",
+                                 password="hashed", salary=1.0)
+                ticket = Service_Ticket(customer_id=1, service_description=f"Job {i}", price=1.0,
+                                        vin="VIN1234567890", service_date=date.today())
+                ticket.mechanics.extend([helper, crew])
+                db.session.add(ticket)
+            db.session.commit()
+
+    def test_get_mechanic_tickets_constant_queries(self):
+        self._add_tickets(2)
+        response, few = self._count_queries(f'/ticket_mechanics/{self.mechanic_id}/get_mechanic')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json['tickets']), 3)
+        self._add_tickets(8)
+        response, many = self._count_queries(f'/ticket_mechanics/{self.mechanic_id}/get_mechanic')
+        self.assertEqual(len(response.json['tickets']), 11)
+        self.assertEqual(few, many)
+        self.assertTrue(all(len(t['mechanics']) >= 1 for t in response.json['tickets']))
+
+    def test_get_mechanic_tickets_paginated(self):
+        self._add_tickets(4)
+        url = f'/ticket_mechanics/{self.mechanic_id}/get_mechanic?limit=2'
+        seen = []
+        while url:
+            response = self.client.get(url, headers=self.auth_header)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(t['ticket_id'] for t in response.json['tickets'])
+            cursor = response.json['next_cursor']
+            url = f'/ticket_mechanics/{self.mechanic_id}/get_mechanic?limit=2&after={cursor}' if cursor else None
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_mechanic_leaderboard_buckets(self):
+        self._add_tickets(2)
+        with self.app.app_context():
+            old = Service_Ticket(customer_id=1, service_description="Old job", price=1.0,
+                                 vin="VIN1234567890", service_date=date(2020, 1, 15))
+            old.mechanics.append(db.session.get(Mechanics, self.mechanic_id))
+            db.session.add(old)
+            db.session.commit()
+            old_id = old.id
+        url = '/ticket_mechanics/get_most_ticket_mechanic'
+        response = self.client.get(f'{url}?limit=1', headers=self.auth_header)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [{"id": self.mechanic_id, "first_name": "Test", "last_name": "Mechanic",
+                                          "email": "mech@email.com", "ticket_count": 4}])
+
+        response = self.client.get(f'{url}?from=2020-01-01&to=2020-12-31', headers=self.auth_header)
+        self.assertEqual([(m['id'], m['ticket_count']) for m in response.json], [(self.mechanic_id, 1)])
+
+        # Bulk unassign runs as plain SQL; the triggers still keep the buckets in step
+        self.client.delete(f'/ticket_mechanics/{old_id}/unassign_mechanics', headers=self.auth_header,
+                           json={"mechanic_ids": [self.mechanic_id]})
+        response = self.client.get(f'{url}?from=2020-01-01&to=2020-12-31', headers=self.auth_header)
+        self.assertEqual(response.json, [])
+        response = self.client.get(f'{url}?from=2020-13-01', headers=self.auth_header)
+        self.assertEqual(response.status_code, 400)
+
 if __name__ == "__main__":
     unittest.main()